@@ -0,0 +1,645 @@
+"""Бенчмарк и проверка эквивалентности реализаций лабораторных работ.
+
+Покрывает:
+  - все реализации фильтра μ1 (лабораторная работа №2) на синтетических
+    изображениях возрастающего размера;
+  - все вычислители y(x) = a1*sin(b1*x) + a2*sin(b2*x) + a3*sin(b3*x)
+    (лабораторная работа №1) на сетках возрастающей длины;
+  - медианный фильтр Монахова (ядра NumPy и Numba) против прямого
+    вычисления медианы каждого окна;
+  - поиск границ символов Монахова от грубого уровня пирамиды к точному
+    (pyramid.coarse_to_fine) против полного прохода с d=1.
+
+Каждый результат сравнивается с эталоном. Известные расхождения
+(например, число позиций (width - w) // (d + 1) у Скворцова) не считаются
+ошибкой, но проверяются: реализация должна отличаться от эталона именно так,
+как описано, и никак иначе.
+
+Примеры запуска (из корня репозитория):
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --full --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LABS_DIR = os.path.join(REPO_DIR, "Лабораторные работы")
+
+# Порог, после которого замедление относительно базовой линии считается регрессией
+REGRESSION_RATIO = 1.25
+# Медианный фильтр по гистограммам не должен замедляться с ростом радиуса:
+# время при наибольшем радиусе - не больше стольких времен при наименьшем
+RADIUS_RATIO = 1.5
+
+
+# ---------------------------------------------------------------------------
+# Загрузка модулей студентов
+# ---------------------------------------------------------------------------
+
+_modules = {}
+
+
+def load_lab(relpath):
+    """Импорт файла лабораторной работы по пути относительно 'Лабораторные работы'"""
+    if relpath in _modules:
+        return _modules[relpath]
+    path = os.path.join(LABS_DIR, relpath)
+    module_dir = os.path.dirname(path)
+    # Модули из папки студента (например, instrumentation.py) должны находиться
+    if module_dir not in sys.path:
+        sys.path.insert(0, module_dir)
+    # Модуль регистрируется под своим именем, чтобы соседние модули, которые
+    # импортируют его обычным import, получали тот же объект (кэш Numba
+    # привязан к имени модуля)
+    name = os.path.splitext(os.path.basename(path))[0]
+    loaded = sys.modules.get(name)
+    if loaded is not None and os.path.abspath(getattr(loaded, '__file__', '')) == os.path.abspath(path):
+        _modules[relpath] = loaded
+        return loaded
+    if not name.isidentifier() or name in sys.modules:
+        name = "lab_%d" % len(_modules)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    with quiet():
+        spec.loader.exec_module(module)
+    _modules[relpath] = module
+    return module
+
+
+@contextlib.contextmanager
+def quiet():
+    """Подавление вывода реализаций (таблицы, прогресс-бары)"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            yield
+
+
+# ---------------------------------------------------------------------------
+# Синтетические данные
+# ---------------------------------------------------------------------------
+
+def make_page(height, width, seed=0, line_height=40, pitch=24):
+    """Синтетическая "страница": светлый фон с шумом и строки темных символов"""
+    rng = np.random.default_rng(seed)
+    page = rng.integers(215, 256, size=(height, width), dtype=np.uint8)
+    for top in range(line_height // 4, height - line_height // 2, line_height):
+        bottom = min(height, top + line_height * 2 // 3)
+        # Символ - набор вертикальных штрихов внутри ячейки шириной pitch
+        cols = np.zeros(width, dtype=bool)
+        offsets = rng.integers(0, pitch // 2, size=width // pitch + 1)
+        strokes = rng.integers(2, pitch // 3, size=width // pitch + 1)
+        for i, start in enumerate(range(0, width, pitch)):
+            cols[start + offsets[i]:start + offsets[i] + strokes[i]] = True
+        band = page[top:bottom]
+        band[:, cols] = rng.integers(0, 60, size=(bottom - top, int(cols.sum())), dtype=np.uint8)
+    return page
+
+
+def reference_mu1(arr, w, d):
+    """Эталон μ1: суммы столбцов в int64 и префиксные суммы"""
+    height, width = arr.shape
+    cols = arr.sum(axis=0, dtype=np.int64)
+    prefix = np.concatenate(([0], np.cumsum(cols)))
+    left = np.arange(0, width - w + 1, d)
+    half = w // 2
+    y = (prefix[left + w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+    x = left + w / 2
+    return x, y
+
+
+def make_sparse_page(height, width, block=512, every=8, seed=0):
+    """Страница, где текст занимает только каждый every-й блок столбцов (заголовки, поля)"""
+    page = make_page(height, width, seed)
+    blank = (np.arange(width) // block) % every != 0
+    page[:, blank] = 255
+    return page
+
+
+def reference_boundaries(arr, w, threshold=0.3):
+    """Эталон границ: μ1 с d=1 и правило find_boundaries, координаты x центров окон"""
+    x, y = reference_mu1(arr, w, 1)
+    mid, prev, nxt = y[1:-1], y[:-2], y[2:]
+    peaks = x[1:-1][(mid > prev) & (mid > nxt) & (mid > y.max() * threshold)]
+    valleys = x[1:-1][(mid < prev) & (mid < nxt) & (mid < y.min() * threshold)]
+    return peaks, valleys
+
+
+def reference_lab1(coeffs, x):
+    """Эталон лабораторной №1 в точках x (float64)"""
+    a1, b1, a2, b2, a3, b3 = coeffs
+    x = np.asarray(x, dtype=np.float64)
+    return a1 * np.sin(b1 * x) + a2 * np.sin(b2 * x) + a3 * np.sin(b3 * x)
+
+
+# ---------------------------------------------------------------------------
+# Реестр реализаций
+# ---------------------------------------------------------------------------
+
+class SkipCase(Exception):
+    """Реализация недоступна в этом окружении (например, нет Numba)"""
+
+
+# Каждая запись: имя, функция, известное расхождение (или None), предел размера.
+# Новые движки μ1 регистрируются здесь же декоратором mu1_case.
+MU1_CASES = []
+LAB1_CASES = []
+MEDIAN_CASES = []
+BOUNDARY_CASES = []
+
+
+def mu1_case(name, divergence=None, max_pixels=None):
+    """Регистрация реализации μ1: функция (arr, w, d) -> (x, y)"""
+    def register(func):
+        MU1_CASES.append({'name': name, 'func': func,
+                          'divergence': divergence, 'max_size': max_pixels})
+        return func
+    return register
+
+
+def median_case(name, max_pixels=None):
+    """Регистрация медианного фильтра: функция (arr, radius) -> массив"""
+    def register(func):
+        MEDIAN_CASES.append({'name': name, 'func': func,
+                             'divergence': None, 'max_size': max_pixels})
+        return func
+    return register
+
+
+def boundary_case(name, max_pixels=None):
+    """Регистрация поиска границ: функция (arr, w) -> (peaks, valleys, доля вычисленных позиций)"""
+    def register(func):
+        BOUNDARY_CASES.append({'name': name, 'func': func,
+                               'divergence': None, 'max_size': max_pixels})
+        return func
+    return register
+
+
+def lab1_case(name, divergence=None, max_samples=None):
+    """Регистрация вычислителя y(x): функция (coeffs, x0, xk, dx) -> (x, y)"""
+    def register(func):
+        LAB1_CASES.append({'name': name, 'func': func,
+                           'divergence': divergence, 'max_size': max_samples})
+        return func
+    return register
+
+
+MONAKHOV_LAB2 = "Монахов Никита Юрьевич/МиСОС_23_ВМз_Монахов_НЮ_ЛР_2.py"
+ABRAMOV_LAB2 = "Абрамов Алексей Вадимович/Лабораторная_работа_2_Абрамов_23_ВМз.py"
+POLITSYN_LAB2 = "Полицын Иван Викторович/lab2.py"
+SKVORTSOV_LAB2 = "Скворцов Андрей Павлович/Лабораторная_работа_2__Косноль_23_ВМз_Скворцов_АП.py"
+MONAKHOV_ENGINE = "Монахов Никита Юрьевич/mu1_engine.py"
+MONAKHOV_SAT = "Монахов Никита Юрьевич/integral_image.py"
+MONAKHOV_ONLINE = "Монахов Никита Юрьевич/online_mu1.py"
+MONAKHOV_KERNELS = "Монахов Никита Юрьевич/kernels.py"
+MONAKHOV_MEDIAN = "Монахов Никита Юрьевич/median_filter.py"
+MONAKHOV_PYRAMID = "Монахов Никита Юрьевич/pyramid.py"
+
+ABRAMOV_LAB1 = "Абрамов Алексей Вадимович/main.py"
+MONAKHOV_LAB1 = "Монахов Никита Юрьевич/МиСОС_22_ВМз_Монахов_НЮ_ЛР_1.py"
+POLITSYN_LAB1 = "Полицын Иван Викторович/MiSOS_LR1.py"
+SKVORTSOV_LAB1 = "Скворцов Андрей Павлович/Лабораторная_работа_1_23_ВМз_Скворцов_АП.py"
+
+
+@mu1_case("monakhov.apply_filter")
+def _monakhov_apply_filter(arr, w, d):
+    module = load_lab(MONAKHOV_LAB2)
+    analyzer = module.ImageFilterAnalyzer()
+    height, width = arr.shape
+    image_data = {'array': arr, 'width': width, 'height': height}
+    return analyzer.apply_filter(image_data, w, d)
+
+
+@mu1_case("abramov.compute_mu1_signal")
+def _abramov_compute_mu1_signal(arr, w, d):
+    return load_lab(ABRAMOV_LAB2).compute_mu1_signal(arr, w, d)
+
+
+@mu1_case("politsyn.filterMu1")
+def _politsyn_filter_mu1(arr, w, d):
+    height, width = arr.shape
+    return load_lab(POLITSYN_LAB2).filterMu1(arr, width, w, height, d)
+
+
+@mu1_case("skvortsov.getFilter", divergence="position_count")
+def _skvortsov_get_filter(arr, w, d):
+    image = Image.fromarray(arr)
+    return load_lab(SKVORTSOV_LAB2).getFilter(image, arr, w, d)
+
+
+@mu1_case("engine.mu1_profile")
+def _engine_mu1_profile(arr, w, d):
+    return load_lab(MONAKHOV_ENGINE).mu1_profile(arr, w, d)
+
+
+@mu1_case("engine.mu1_profile[strips=4]")
+def _engine_mu1_profile_strips(arr, w, d):
+    return load_lab(MONAKHOV_ENGINE).mu1_profile(arr, w, d, workers=4)
+
+
+@mu1_case("engine.filter_bank[mu1]")
+def _engine_filter_bank(arr, w, d):
+    x, features, names = load_lab(MONAKHOV_ENGINE).filter_bank(arr, w, d)
+    return x, features[names.index('mu1')]
+
+
+@mu1_case("integral_image.mu1_horizontal")
+def _integral_image_mu1(arr, w, d):
+    return load_lab(MONAKHOV_SAT).mu1_horizontal(arr, w, d)
+
+
+@mu1_case("online_mu1.OnlineMu1[block=256]")
+def _online_mu1(arr, w, d):
+    online = load_lab(MONAKHOV_ONLINE).OnlineMu1(w, d)
+    xs, ys = [], []
+    for start in range(0, arr.shape[1], 256):
+        x, y, _ = online.push(arr[:, start:start + 256])
+        xs.append(x)
+        ys.append(y)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _kernel_case(name):
+    def run(arr, w, d):
+        module = load_lab(MONAKHOV_KERNELS)
+        if name not in module.BACKENDS or (name == 'numba' and module.numba is None):
+            raise SkipCase(name)
+        x, y, _, _ = module.BACKENDS[name]().mu1_with_extrema(arr, w, d)
+        return x, y
+    return run
+
+
+mu1_case("kernels.numpy")(_kernel_case('numpy'))
+mu1_case("kernels.numba")(_kernel_case('numba'))
+
+
+def _median_kernel_case(name):
+    def run(arr, radius):
+        module = load_lab(MONAKHOV_KERNELS)
+        if name == 'numba' and module.numba is None:
+            raise SkipCase(name)
+        return module.BACKENDS[name]().median(arr, radius)
+    return run
+
+
+median_case("median.numpy")(_median_kernel_case('numpy'))
+median_case("median.numba")(_median_kernel_case('numba'))
+
+
+@boundary_case("engine.find_extrema[d=1]")
+def _engine_find_extrema(arr, w):
+    engine = load_lab(MONAKHOV_ENGINE)
+    x, y = engine.mu1_profile(arr, w, 1)
+    peaks, valleys = engine.find_extrema(y, 0.3)
+    return x[peaks], x[valleys], 1.0
+
+
+@boundary_case("pyramid.coarse_to_fine")
+def _pyramid_coarse_to_fine(arr, w):
+    # Окно грубого уровня (w / 4 при двух уровнях) должно быть четным и не меньше 2
+    if w // 4 < 2 or (w // 4) % 2:
+        raise SkipCase("coarse_to_fine")
+    found = load_lab(MONAKHOV_PYRAMID).coarse_to_fine(arr, w)
+    return found['peaks'], found['valleys'], found['refined_fraction']
+
+
+@lab1_case("abramov.compute_table", max_samples=10 ** 6)
+def _abramov_compute_table(coeffs, x0, xk, dx):
+    return load_lab(ABRAMOV_LAB1).compute_table(*coeffs, x0, xk, dx)
+
+
+@lab1_case("monakhov.calculate_y_values")
+def _monakhov_calculate_y_values(coeffs, x0, xk, dx):
+    x = np.arange(x0, xk + dx, dx)
+    return x, load_lab(MONAKHOV_LAB1).calculate_y_values(x, coeffs)
+
+
+@lab1_case("politsyn.calculation", max_samples=10 ** 6)
+def _politsyn_calculation(coeffs, x0, xk, dx):
+    x = np.arange(x0, xk + dx, dx)
+    return load_lab(POLITSYN_LAB1).calculation(*coeffs, x)
+
+
+@lab1_case("skvortsov.getY", divergence="third_term", max_samples=10 ** 6)
+def _skvortsov_get_y(coeffs, x0, xk, dx):
+    module = load_lab(SKVORTSOV_LAB1)
+    args = np.array(list(coeffs) + [x0, xk, dx], dtype="float32")
+    x = module.getX(args[6], args[7], args[8])
+    return x, module.getY(args, x)
+
+
+# ---------------------------------------------------------------------------
+# Известные расхождения
+# ---------------------------------------------------------------------------
+
+def _check_position_count(x, y, ref_x, ref_y, ctx):
+    # Число позиций (width - w) // (d + 1) вместо (width - w) // d + 1
+    expected = (ctx['width'] - ctx['w']) // (ctx['d'] + 1)
+    n = len(y)
+    return (n == expected and np.array_equal(x, ref_x[:n])
+            and np.array_equal(y, ref_y[:n]))
+
+
+def _check_third_term(x, y, ref_x, ref_y, ctx):
+    # Третье слагаемое вычисляется как b2 * sin(a3 * x) вместо a3 * sin(b3 * x)
+    # (аргументы синусов и слагаемые вычисляются в float32, как в самой реализации)
+    a1, b1, a2, b2, a3, b3 = np.array(ctx['coeffs'], dtype="float32")
+    x32 = np.asarray(x, dtype=np.float32)
+    expected = (a1 * np.sin((b1 * x32).astype(np.float64))
+                + a2 * np.sin((b2 * x32).astype(np.float64))
+                + b2 * np.sin((a3 * x32).astype(np.float64)))
+    return np.allclose(y, expected, rtol=1e-5, atol=1e-5)
+
+
+DIVERGENCES = {
+    'position_count': ("число позиций (width - w) // (d + 1)", _check_position_count),
+    'third_term': ("третье слагаемое b2*sin(a3*x) вместо a3*sin(b3*x)", _check_third_term),
+}
+
+
+# ---------------------------------------------------------------------------
+# Замеры
+# ---------------------------------------------------------------------------
+
+def measure(func, repeat, trace_memory):
+    """Лучшее время из repeat запусков и пиковая память отдельного запуска"""
+    # Прогревочный запуск: импорт модулей, первые выделения памяти
+    with quiet():
+        result = func()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with quiet():
+            func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            with quiet():
+                func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def classify(case, x, y, ref_x, ref_y, equal, ctx):
+    """Статус результата: OK, KNOWN (ожидаемое расхождение) или FAIL"""
+    if equal(x, y, ref_x, ref_y):
+        return "OK", ""
+    if case['divergence']:
+        note, check = DIVERGENCES[case['divergence']]
+        if check(x, y, ref_x, ref_y, ctx):
+            return "KNOWN", note
+        return "FAIL", "расхождение не совпадает с известным: " + note
+    return "FAIL", "результат отличается от эталона"
+
+
+def _mu1_equal(x, y, ref_x, ref_y):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    # Беззнаковый результат не может совпасть с отрицательными значениями эталона
+    if y.dtype.kind == 'u' and len(ref_y) and ref_y.min() < 0:
+        return False
+    return (len(y) == len(ref_y) and np.array_equal(x, ref_x)
+            and np.array_equal(y.astype(np.int64), ref_y))
+
+
+def _lab1_equal(x, y, coeffs, _):
+    return np.allclose(y, reference_lab1(coeffs, x), rtol=1e-9, atol=1e-9)
+
+
+def run_mu1(sizes, w, d, repeat, trace_memory, only=None):
+    results = []
+    for height, width in sizes:
+        arr = make_page(height, width)
+        ref_x, ref_y = reference_mu1(arr, w, d)
+        ctx = {'width': width, 'w': w, 'd': d}
+        for case in MU1_CASES:
+            if only and not any(s in case['name'] for s in only):
+                continue
+            if case['max_size'] and height * width > case['max_size']:
+                continue
+            try:
+                (x, y), elapsed, peak = measure(lambda: case['func'](arr, w, d), repeat, trace_memory)
+            except SkipCase:
+                continue
+            status, note = classify(case, x, y, ref_x, ref_y, _mu1_equal, ctx)
+            results.append({'impl': case['name'], 'size': f"{height}x{width}",
+                             'w': w, 'd': d, 'time_s': elapsed, 'peak_bytes': peak,
+                             'status': status, 'note': note})
+            print_row(results[-1])
+    return results
+
+
+def run_median(sizes, radii, repeat, trace_memory, only=None):
+    """Медианный фильтр: результат должен совпасть с median_reference побайтно,
+    а время - не расти с радиусом (не больше RADIUS_RATIO от наименьшего)"""
+    results = []
+    for height, width in sizes:
+        arr = make_page(height, width)
+        times = {}
+        for radius in radii:
+            ref = None
+            for case in MEDIAN_CASES:
+                if only and not any(s in case['name'] for s in only):
+                    continue
+                if case['max_size'] and height * width > case['max_size']:
+                    continue
+                try:
+                    out, elapsed, peak = measure(lambda: case['func'](arr, radius), repeat, trace_memory)
+                except SkipCase:
+                    continue
+                if ref is None:
+                    # Эталон медленный, поэтому считается один раз на размер и радиус
+                    ref = load_lab(MONAKHOV_MEDIAN).median_reference(arr, radius)
+                equal = out.dtype == ref.dtype and np.array_equal(out, ref)
+                status, note = ("OK", "") if equal else ("FAIL", "результат отличается от эталона")
+                first = times.setdefault(case['name'], (radius, elapsed))
+                growth = elapsed / first[1] if first[1] else 1.0
+                if equal and growth > RADIUS_RATIO:
+                    status, note = "FAIL", f"время растет с радиусом: x{growth:.2f} от r={first[0]}"
+                results.append({'impl': f"{case['name']}[r={radius}]", 'size': f"{height}x{width}",
+                                'radius': radius, 'time_s': elapsed, 'peak_bytes': peak,
+                                'status': status, 'note': note})
+                print_row(results[-1])
+    return results
+
+
+def run_boundaries(sizes, w, tolerance, repeat, trace_memory, only=None):
+    """Поиск границ: каждая граница эталона найдена не дальше tolerance, и лишних нет"""
+    match = load_lab(MONAKHOV_PYRAMID).match_boundaries
+    results = []
+    for height, width in sizes:
+        arr = make_sparse_page(height, width)
+        ref_peaks, ref_valleys = reference_boundaries(arr, w)
+        for case in BOUNDARY_CASES:
+            if only and not any(s in case['name'] for s in only):
+                continue
+            if case['max_size'] and height * width > case['max_size']:
+                continue
+            try:
+                (peaks, valleys, fraction), elapsed, peak = measure(lambda: case['func'](arr, w),
+                                                                    repeat, trace_memory)
+            except SkipCase:
+                continue
+            # Полнота (границы эталона найдены) и точность (найденные есть в эталоне)
+            scores = [match(peaks, ref_peaks, tolerance), match(ref_peaks, peaks, tolerance),
+                      match(valleys, ref_valleys, tolerance), match(ref_valleys, valleys, tolerance)]
+            equal = min(scores) == 1.0
+            note = f"вычислено {fraction:.0%} позиций"
+            if not equal:
+                note = (f"совпало границ: {min(scores[0], scores[2]):.1%} эталона, "
+                        f"{min(scores[1], scores[3]):.1%} найденных; " + note)
+            results.append({'impl': case['name'], 'size': f"{height}x{width}",
+                            'w': w, 'tolerance': tolerance,
+                            'time_s': elapsed, 'peak_bytes': peak,
+                            'status': "OK" if equal else "FAIL", 'note': note})
+            print_row(results[-1])
+    return results
+
+
+def run_lab1(counts, repeat, trace_memory, only=None):
+    coeffs = (1.0, 1.0, 2.0, 2.0, 3.0, 3.0)
+    dx = 0.001
+    results = []
+    for n in counts:
+        x0, xk = 0.0, (n - 1) * dx
+        for case in LAB1_CASES:
+            if only and not any(s in case['name'] for s in only):
+                continue
+            if case['max_size'] and n > case['max_size']:
+                continue
+            (x, y), elapsed, peak = measure(lambda: case['func'](coeffs, x0, xk, dx), repeat, trace_memory)
+            ctx = {'coeffs': coeffs}
+            # Сетки у реализаций свои, поэтому эталон считается в их точках
+            status, note = classify(case, x, y, coeffs, None, _lab1_equal, ctx)
+            if status != "FAIL" and abs(len(x) - n) > 1:
+                status, note = "FAIL", f"число точек {len(x)} вместо {n}"
+            results.append({'impl': case['name'], 'size': str(n),
+                            'time_s': elapsed, 'peak_bytes': peak,
+                            'status': status, 'note': note})
+            print_row(results[-1])
+    return results
+
+
+def print_row(row):
+    peak = "-" if row['peak_bytes'] is None else f"{row['peak_bytes'] / 2 ** 20:8.1f} МБ"
+    print(f"  {row['impl']:<32} {row['size']:>12} {row['time_s'] * 1000:11.2f} мс "
+          f"{peak:>12}  {row['status']:<5} {row['note']}")
+
+
+def compare(results, baseline):
+    """Сравнение с базовой линией; возвращает список регрессий"""
+    index = {}
+    for section in ('mu1', 'lab1', 'median', 'boundaries'):
+        for row in baseline.get(section, []):
+            index[(section, row['impl'], row['size'])] = row
+
+    regressions = []
+    print("\nСравнение с базовой линией:")
+    for section in ('mu1', 'lab1', 'median', 'boundaries'):
+        for row in results.get(section, []):
+            base = index.get((section, row['impl'], row['size']))
+            if base is None:
+                continue
+            ratio = row['time_s'] / base['time_s'] if base['time_s'] else 1.0
+            mark = ""
+            if ratio > REGRESSION_RATIO:
+                mark = "РЕГРЕССИЯ"
+                regressions.append((row['impl'], row['size'], ratio))
+            print(f"  {row['impl']:<32} {row['size']:>12}  x{ratio:5.2f} {mark}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк реализаций μ1 и y(x)")
+    parser.add_argument('--full', action='store_true',
+                        help="полный набор размеров (до 2048x16384 и 10^8 точек)")
+    parser.add_argument('-w', type=int, default=32, help="ширина фильтра")
+    parser.add_argument('-d', type=int, default=1, help="шаг фильтра")
+    parser.add_argument('--radius', type=int, nargs='+', default=[1, 7, 15],
+                        help="радиусы медианного фильтра (время не должно расти с радиусом)")
+    parser.add_argument('--tolerance', type=int, default=2,
+                        help="допуск совпадения границ пирамиды с полным проходом, пикселей")
+    parser.add_argument('--repeat', type=int, default=3, help="число повторов замера")
+    parser.add_argument('--no-memory', action='store_true', help="не замерять память")
+    parser.add_argument('--only', nargs='*', help="подстроки имен реализаций")
+    parser.add_argument('--save', metavar='ФАЙЛ.json', help="сохранить результаты")
+    parser.add_argument('--compare', metavar='ФАЙЛ.json', help="сравнить с базовой линией")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.full:
+        mu1_sizes = [(256, 256), (1024, 1024), (2048, 4096), (2048, 16384)]
+        lab1_counts = [10 ** k for k in range(3, 9)]
+        median_sizes = [(256, 256), (512, 1024), (1024, 2048)]
+        boundary_sizes = [(1024, 4096), (2048, 16384), (2048, 65536)]
+    else:
+        mu1_sizes = [(256, 256), (1024, 1024), (2048, 4096)]
+        lab1_counts = [10 ** k for k in range(3, 6)]
+        median_sizes = [(256, 256), (512, 1024)]
+        boundary_sizes = [(1024, 4096), (2048, 16384)]
+
+    print(f"Фильтр μ1 (w={args.w}, d={args.d}):")
+    mu1 = run_mu1(mu1_sizes, args.w, args.d, args.repeat, not args.no_memory, args.only)
+    print("\nЛабораторная №1, y(x):")
+    lab1 = run_lab1(lab1_counts, args.repeat, not args.no_memory, args.only)
+    print(f"\nМедианный фильтр (радиусы {', '.join(map(str, args.radius))}):")
+    median = run_median(median_sizes, args.radius, args.repeat, not args.no_memory, args.only)
+    print(f"\nГраницы символов, пирамида против полного прохода (w={args.w}, допуск {args.tolerance}):")
+    boundaries = run_boundaries(boundary_sizes, args.w, args.tolerance, args.repeat,
+                                not args.no_memory, args.only)
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'full': args.full,
+        },
+        'mu1': mu1,
+        'lab1': lab1,
+        'median': median,
+        'boundaries': boundaries,
+    }
+
+    failed = [r for r in mu1 + lab1 + median + boundaries if r['status'] == "FAIL"]
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nРезультаты сохранены: {args.save}")
+
+    if failed or regressions:
+        print(f"\nОшибок эквивалентности: {len(failed)}, регрессий: {len(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
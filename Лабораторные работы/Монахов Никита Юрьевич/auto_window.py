@@ -0,0 +1,84 @@
+import numpy as np
+
+import mu1_engine
+
+# Шаг d по умолчанию - такая доля ширины окна (границы не теряются,
+# а позиций окна в несколько раз меньше, чем при d=1)
+STEP_FRACTION = 8
+
+
+def autocorrelation(profile):
+    """Нормированная автокорреляция профиля (через БПФ, без циклического наложения).
+
+    Из профиля вычитается линейный тренд (неравномерное освещение),
+    значение при нулевом сдвиге равно 1.
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    n = len(profile)
+    if n < 2:
+        return np.ones(n)
+    x = np.arange(n)
+    profile = profile - np.polyval(np.polyfit(x, profile, 1), x)
+    # Дополнение нулями до 2n: корреляция линейная, а не циклическая
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(profile, size)
+    acf = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, size)[:n]
+    return acf / acf[0] if acf[0] > 0 else np.zeros(n)
+
+
+def character_pitch(col_sums, min_lag=4, min_strength=None, harmonic=0.8):
+    """Преобладающий шаг символов по профилю сумм столбцов или None.
+
+    Шаг - положение пика автокорреляции после ее первого перехода через
+    ноль. Среди пиков не ниже min_strength (по умолчанию - выше уровня
+    случайных пиков для профиля такой длины) берется наименьший сдвиг,
+    пик которого не меньше harmonic от наибольшего: пики на кратных
+    шагах (2T, 3T, ...) почти такие же высокие. Положение уточняется
+    по параболе через три точки. В профиле должно уместиться не меньше
+    двух периодов.
+
+    Возвращает (шаг в пикселях, высота пика автокорреляции).
+    """
+    acf = autocorrelation(col_sums)
+    n = len(acf)
+    if min_strength is None:
+        # У шума автокорреляция порядка 1/sqrt(n); 4/sqrt(n) он почти не превышает
+        min_strength = max(0.1, 4 / np.sqrt(max(n, 1)))
+    below = np.flatnonzero(acf[1:] <= 0)
+    if len(below) == 0:
+        return None
+    start = max(min_lag, below[0] + 1)
+    stop = n // 2
+    if stop - start < 2:
+        return None
+    lags = np.arange(start, stop)
+    is_peak = (acf[lags] > acf[lags - 1]) & (acf[lags] >= acf[lags + 1]) & (acf[lags] >= min_strength)
+    peaks = lags[is_peak]
+    if len(peaks) == 0:
+        return None
+    best = acf[peaks].max()
+    lag = peaks[np.flatnonzero(acf[peaks] >= harmonic * best)[0]]
+
+    left, center, right = acf[lag - 1], acf[lag], acf[lag + 1]
+    curvature = left - 2 * center + right
+    offset = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+    return float(lag + offset), float(center)
+
+
+def choose_parameters(col_sums, width=None, **pitch_options):
+    """Параметры фильтра по шагу символов: (w, d, шаг) или None.
+
+    w - ближайшее к шагу кратное 4 (не меньше 4 и не больше ширины),
+    d - w/STEP_FRACTION (не меньше 1).
+    """
+    width = len(col_sums) if width is None else width
+    found = character_pitch(col_sums, **pitch_options)
+    if found is None:
+        return None
+    pitch, _ = found
+    w = min(max(4, 4 * int(round(pitch / 4))), width - width % 4)
+    if w < 4:
+        return None
+    d = max(1, w // STEP_FRACTION)
+    mu1_engine.validate_params(w, d)
+    return w, d, pitch
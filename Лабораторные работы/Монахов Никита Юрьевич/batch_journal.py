@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+def file_sha1(path, chunk=1 << 20):
+    """SHA-1 содержимого файла (чтение блоками)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def atomic_open(path, mode='w', **kwargs):
+    """Запись файла через временный рядом с ним и os.replace.
+
+    При ошибке записи path остается прежним (или не появляется), поэтому
+    наполовину записанный выходной файл не примется за готовый.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+        raise
+
+
+class BatchJournal:
+    """Журнал завершенных элементов пакета для продолжения после сбоя.
+
+    Каждый элемент (страница файла с набором параметров) после записи всех
+    его результатов добавляется в файл JSON lines одной строкой, которая
+    сразу сбрасывается на диск (fsync). Ключ элемента - SHA-1 содержимого
+    файла, номер страницы и строка параметров: измененный файл и новые
+    параметры считаются заново, остальное пропускается.
+
+    Недописанная при сбое последняя строка при чтении пропускается, и
+    элемент обрабатывается заново; результаты, записанные наполовину,
+    при этом перезаписываются. Элемент также пересчитывается, если
+    какого-то из его выходных файлов больше нет. Чтобы не читать
+    файлы целиком при каждом запуске, хэш берется из журнала, если
+    размер и время изменения файла не поменялись.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.entries = {}     # ключ -> запись
+        self.torn = 0         # недописанных строк
+        self._hashes = {}     # (путь, размер, mtime_ns) -> sha1
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # Обрываем недописанную строку, чтобы новая запись начиналась с новой строки
+            self._file.write("\n")
+            self._file.flush()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key = entry['key']
+                except (ValueError, KeyError, TypeError):
+                    self.torn += 1
+                    continue
+                self.entries[key] = entry
+                self._hashes[(entry['file'], entry['size'], entry['mtime_ns'])] = entry['sha1']
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def file_info(self, path):
+        """(абсолютный путь, размер, mtime_ns, sha1) входного файла"""
+        full = os.path.abspath(path)
+        st = os.stat(full)
+        signature = (full, st.st_size, st.st_mtime_ns)
+        sha1 = self._hashes.get(signature)
+        if sha1 is None:
+            sha1 = self._hashes[signature] = file_sha1(full)
+        return full, st.st_size, st.st_mtime_ns, sha1
+
+    @staticmethod
+    def item_key(sha1, page, params):
+        return f"{sha1}/{page}/{params}"
+
+    def is_done(self, key, outputs=None):
+        """Элемент завершен и все его выходные файлы на месте.
+
+        outputs - ожидаемые файлы (по умолчанию записанные в журнале);
+        копия файла под другим именем так пересчитывается под своим именем.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        return all(os.path.exists(p) for p in (entry['outputs'] if outputs is None else outputs))
+
+    def record(self, key, info, page, outputs):
+        """Запись о завершении элемента (одной строкой, со сбросом на диск)"""
+        full, size, mtime_ns, sha1 = info
+        entry = {'key': key, 'file': full, 'size': size, 'mtime_ns': mtime_ns, 'sha1': sha1,
+                 'page': page, 'outputs': [os.path.abspath(p) for p in outputs], 'time': time.time()}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.entries[key] = entry
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,83 @@
+import numpy as np
+
+import mu1_engine
+
+# Сколько строк упакованной страницы обрабатывается за раз в column_sums
+_BLOCK_ROWS = 256
+
+
+def otsu_threshold(img_array):
+    """Порог Оцу по гистограмме, построенной за один проход по изображению.
+
+    Возвращает t: пиксели > t относятся к светлому классу (фон/бумага).
+    """
+    hist = np.bincount(img_array.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    levels = np.arange(256)
+    weight0 = np.cumsum(hist)
+    weight1 = total - weight0
+    mass0 = np.cumsum(hist * levels)
+    mean0 = mass0 / np.maximum(weight0, 1)
+    mean1 = (mass0[-1] - mass0) / np.maximum(weight1, 1)
+    # Межклассовая дисперсия для порогов 0..255
+    between = weight0 * weight1 * (mean0 - mean1) ** 2
+    return int(np.argmax(between))
+
+
+class PackedPage:
+    """Бинаризованная страница, упакованная по 8 пикселей в байт (np.packbits).
+
+    Бит 1 - светлый пиксель (яркость выше порога), 0 - темный (текст).
+    Занимает в 8 раз меньше памяти, чем uint8. Суммы столбцов считаются
+    прямо по упакованным байтам: для каждой из 8 позиций бита блок строк
+    сдвигается и маскируется (bit = byte >> (7 - k) & 1) и складывается
+    по строкам. Временный буфер - один блок упакованных байтов, то есть
+    в 8 раз меньше распакованного блока. μ1 получается из этих сумм так же,
+    как в mu1_engine, и равен разности числа светлых пикселей половин окна.
+    """
+
+    def __init__(self, bits, width, threshold):
+        self.bits = bits
+        self.width = width
+        self.height = bits.shape[0]
+        self.threshold = threshold
+
+    @classmethod
+    def from_gray(cls, img_array, threshold=None):
+        """Бинаризация (по умолчанию порогом Оцу) и упаковка по строкам"""
+        if threshold is None:
+            threshold = otsu_threshold(img_array)
+        return cls(np.packbits(img_array > threshold, axis=1), img_array.shape[1], threshold)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def column_sums(self):
+        """Число светлых пикселей в каждом столбце (uint16, если высота позволяет)"""
+        n_bytes = self.bits.shape[1]
+        dtype = mu1_engine.column_dtype(self.height)
+        # sums[k] - суммы k-го бита всех байтов (столбцы 8*i + k, старший бит первый)
+        sums = np.zeros((8, n_bytes), dtype=dtype)
+        buffer = np.empty((min(_BLOCK_ROWS, self.height), n_bytes), dtype=np.uint8)
+        for start in range(0, self.height, _BLOCK_ROWS):
+            block = self.bits[start:start + _BLOCK_ROWS]
+            bit = buffer[:len(block)]
+            for k in range(8):
+                np.right_shift(block, 7 - k, out=bit)
+                np.bitwise_and(bit, 1, out=bit)
+                sums[k] += bit.sum(axis=0, dtype=dtype)
+        return sums.T.ravel()[:self.width]
+
+    def mu1(self, w, d):
+        """Профиль μ1 (x, y) по упакованной странице"""
+        mu1_engine.validate_params(w, d)
+        left = mu1_engine.window_positions(self.width, w, d)
+        prefix = mu1_engine.prefix_sums(self.column_sums())
+        half = w // 2
+        y = (prefix[left + w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+        return left + w / 2, y
+
+    def unpack(self):
+        """Распаковка в uint8 со значениями 0/1 (для этапов, которым нужны пиксели)"""
+        return np.unpackbits(self.bits, axis=1, count=self.width)
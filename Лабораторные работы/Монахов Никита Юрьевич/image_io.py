@@ -0,0 +1,78 @@
+import numpy as np
+from PIL import Image
+
+# Расширения файлов, которые считаются изображениями
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+# Масштабы, которые декодер JPEG получает прямо из DCT-коэффициентов
+JPEG_SCALES = (1, 2, 4, 8)
+
+
+def reduced_size(size, scale):
+    """Размер после уменьшения в scale раз (с округлением вверх, как у декодера)"""
+    width, height = size
+    return -(-width // scale), -(-height // scale)
+
+
+def frame_count(path):
+    """Число страниц (кадров) в файле; для обычных изображений - 1"""
+    with Image.open(path) as img:
+        return getattr(img, 'n_frames', 1)
+
+
+def _to_gray(img, scale):
+    """Текущий кадр открытого изображения в оттенках серого с уменьшением"""
+    target = reduced_size(img.size, scale)
+    if img.format == 'JPEG':
+        img.draft('L', target)
+    gray = img.convert('L') if img.mode != 'L' else img
+    gray.load()
+    if gray.size != target:
+        # Декодер не уменьшил изображение (не JPEG) или уменьшил не до конца
+        gray = gray.reduce(round(gray.width / target[0]))
+    return np.array(gray)
+
+
+def _check_scale(scale):
+    if scale not in JPEG_SCALES:
+        raise ValueError(f"Масштаб должен быть одним из {JPEG_SCALES}, получено {scale}.")
+
+
+def load_grayscale(path, scale=1, frame=0):
+    """Чтение изображения сразу в оттенках серого, при scale > 1 - с уменьшением.
+
+    Для JPEG перевод в оттенки серого и уменьшение в 2, 4 или 8 раз выполняет
+    сам декодер (draft): он выдает только яркостный канал Y и не восстанавливает
+    пропущенные DCT-коэффициенты, поэтому цветное изображение полного размера
+    не создается. Для остальных форматов изображение переводится в оттенки
+    серого и уменьшается усреднением блоков (reduce). Цветной оригинал
+    закрывается сразу после чтения. frame - номер страницы многостраничного
+    файла (TIFF).
+
+    Возвращает (массив uint8, сведения об исходном файле).
+    """
+    _check_scale(scale)
+    with Image.open(path) as img:
+        frames = getattr(img, 'n_frames', 1)
+        if not 0 <= frame < frames:
+            raise ValueError(f"В файле {frames} страниц, запрошена страница {frame + 1}.")
+        img.seek(frame)
+        info = {'format': img.format, 'mode': img.mode, 'size': img.size,
+                'scale': scale, 'frame': frame, 'frames': frames}
+        return _to_gray(img, scale), info
+
+
+def iter_frames(path, scale=1, frames=None):
+    """Постраничное чтение многостраничного файла.
+
+    Файл открывается один раз, страницы декодируются по одной при переходе
+    к следующей (seek), поэтому в памяти находится только текущая страница.
+    frames - номера нужных страниц (по умолчанию все), остальные не
+    декодируются. Выдает (номер страницы, массив uint8) по порядку.
+    """
+    _check_scale(scale)
+    with Image.open(path) as img:
+        count = getattr(img, 'n_frames', 1)
+        for frame in (range(count) if frames is None else sorted(f for f in frames if 0 <= f < count)):
+            img.seek(frame)
+            yield frame, _to_gray(img, scale)
@@ -0,0 +1,109 @@
+import numpy as np
+
+import mu1_engine
+
+
+class IncrementalMu1:
+    """μ1 для последовательности кадров, в которых меняется лишь часть строк.
+
+    Хранит предыдущий кадр и его суммы столбцов. Для следующего кадра
+    передаются диапазоны измененных строк (и при желании столбцов): суммы
+    столбцов обновляются на разность новых и старых строк, затем
+    пересчитываются только окна, задевающие измененные столбцы, и границы
+    вокруг них. Работа с пикселями пропорциональна площади изменений;
+    остальное - операции над одномерным профилем.
+    """
+
+    def __init__(self, w, d, threshold=0.3):
+        mu1_engine.validate_params(w, d)
+        self.w = w
+        self.d = d
+        self.threshold = threshold
+        self.frame = None
+        self.col_sums = None
+        self.x = None
+        self.y = None
+        self.peaks = None
+        self.valleys = None
+
+    def reset(self, frame):
+        """Полный расчет по первому кадру"""
+        self.frame = np.array(frame, copy=True)
+        # Суммы меняются на разности со знаком - храним в int64
+        self.col_sums = mu1_engine.column_sums(self.frame).astype(np.int64)
+        # Оценка по типу пикселей, а не по первому кадру: следующие кадры могут быть ярче
+        vmax = mu1_engine.pixel_max(self.frame)
+        self._bound = np.iinfo(np.int64).max if vmax is None else vmax * self.frame.size
+        self._left = mu1_engine.window_positions(self.frame.shape[1], self.w, self.d)
+        self.x = self._left + self.w / 2
+        self.y = self._windows(0, len(self._left) - 1)
+        self._y_max, self._y_min = self.y.max(), self.y.min()
+        self.peaks, self.valleys = mu1_engine.find_extrema(self.y, self.threshold)
+        return self.x, self.y
+
+    def update(self, frame, rows, cols=None):
+        """Обновление по новому кадру.
+
+        rows - список диапазонов (start, stop) измененных строк;
+        cols - общий диапазон (start, stop) измененных столбцов (по умолчанию вся ширина).
+        Пиксели вне этих диапазонов должны совпадать с предыдущим кадром.
+        Возвращает (x, y, changed): changed - срез индексов пересчитанных окон.
+        """
+        if self.frame is None:
+            self.reset(frame)
+            return self.x, self.y, slice(0, len(self.y))
+        if frame.shape != self.frame.shape:
+            raise ValueError("Размер кадра изменился - нужен полный пересчет (reset).")
+
+        width = frame.shape[1]
+        c0, c1 = (0, width) if cols is None else (max(0, cols[0]), min(width, cols[1]))
+
+        delta = np.zeros(c1 - c0, dtype=np.int64)
+        for r0, r1 in rows:
+            new = frame[r0:r1, c0:c1]
+            old = self.frame[r0:r1, c0:c1]
+            delta += new.sum(axis=0, dtype=np.int64) - old.sum(axis=0, dtype=np.int64)
+            self.frame[r0:r1, c0:c1] = new
+
+        changed = np.flatnonzero(delta)
+        if len(changed) == 0:
+            return self.x, self.y, slice(0, 0)
+        lo_col, hi_col = c0 + changed[0], c0 + changed[-1] + 1
+        self.col_sums[lo_col:hi_col] += delta[changed[0]:changed[-1] + 1]
+
+        # Окна [left, left + w), пересекающиеся со столбцами [lo_col, hi_col)
+        first = max(0, -(-(lo_col - self.w + 1) // self.d))
+        last = min(len(self._left) - 1, (hi_col - 1) // self.d)
+        if first > last:
+            return self.x, self.y, slice(0, 0)
+        self.y[first:last + 1] = self._windows(first, last)
+
+        self._refresh_extrema(first, last)
+        return self.x, self.y, slice(first, last + 1)
+
+    def _windows(self, first, last):
+        """μ1 окон с номерами first..last по локальным префиксным суммам"""
+        start = self._left[first]
+        stop = self._left[last] + self.w
+        prefix = mu1_engine.prefix_sums(self.col_sums[start:stop], self._bound)
+        left = self._left[first:last + 1] - start
+        half = self.w // 2
+        return (prefix[left + self.w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+
+    def _refresh_extrema(self, first, last):
+        """Обновление масок границ после пересчета окон first..last"""
+        y_max, y_min = self.y.max(), self.y.min()
+        if y_max != self._y_max or y_min != self._y_min:
+            # Сменился порог - пересматриваем весь профиль
+            self._y_max, self._y_min = y_max, y_min
+            self.peaks, self.valleys = mu1_engine.find_extrema(self.y, self.threshold)
+            return
+
+        # Статус могут сменить пересчитанные точки и их непосредственные соседи
+        n = len(self.y)
+        a, b = max(1, first - 1), min(n - 1, last + 2)
+        if a >= b:
+            return
+        mid, prev, nxt = self.y[a:b], self.y[a - 1:b - 1], self.y[a + 1:b + 1]
+        self.peaks[a:b] = (mid > prev) & (mid > nxt) & (mid > y_max * self.threshold)
+        self.valleys[a:b] = (mid < prev) & (mid < nxt) & (mid < y_min * self.threshold)
@@ -0,0 +1,210 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class StageProfiler:
+    """Замер времени и памяти по этапам обработки каждого изображения.
+
+    Для каждого этапа (decode, median, binarize, apply_filter,
+    find_boundaries, plot_function, save_results и др.) записываются:
+      - wall_s     - реальное время выполнения, с
+      - cpu_s      - процессорное время потока, выполнявшего этап, с
+      - peak_bytes - пиковый объем памяти, выделенной за этап (tracemalloc)
+
+    Отдельного этапа перевода в оттенки серого нет: декодер сразу выдает
+    яркость (image_io.load_grayscale, для JPEG - без цветного изображения),
+    и перевод входит в decode.
+
+    Этапы фонового потока (чтение с опережением) замеряются measure и
+    записываются record в основном потоке. tracemalloc считает память всего
+    процесса, поэтому пики точны, только когда этапы не идут параллельно
+    (анализатор при профилировании читает без опережения).
+
+    Записи пишутся в файл в формате JSON lines (одна запись на строку).
+    Если путь не задан, профилировщик ничего не делает.
+    """
+
+    def __init__(self, path=None, trace_memory=True):
+        self.path = path
+        self.enabled = path is not None
+        self.trace_memory = trace_memory
+        self.records = []
+        self._image = None
+        self._params = {}
+        self._image_start = None
+        self._image_peak = 0
+        self._image_cpu = 0.0
+        self._started_tracemalloc = False
+
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def begin_image(self, name, started=None, **params):
+        """Начало обработки очередного изображения
+        
+        started - perf_counter() начала его чтения, если чтение уже прошло
+        (в фоновом потоке): время 'total' отсчитывается от него.
+        """
+        if not self.enabled:
+            return
+        self._image = name
+        self._params = params
+        self._image_peak = 0
+        self._image_cpu = 0.0
+        self._image_start = (time.perf_counter() if started is None else started, time.thread_time())
+
+    def set_params(self, **params):
+        """Дополнение параметров текущего изображения (например, w и d)"""
+        if self.enabled:
+            self._params.update(params)
+
+    @contextmanager
+    def stage(self, name):
+        """Замер одного этапа: with profiler.stage('apply_filter'): ..."""
+        if not self.enabled:
+            yield
+            return
+
+        timings = {}
+        try:
+            with self.measure(timings, name):
+                yield
+        finally:
+            wall, cpu, peak = timings[name]
+            self._image_peak = max(self._image_peak, peak)
+            self._write({
+                'image': self._image,
+                'stage': name,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'peak_bytes': peak,
+                **self._params,
+            })
+
+    @contextmanager
+    def measure(self, timings, name):
+        """Замер этапа в любом потоке: timings[name] = (wall_s, cpu_s, peak_bytes)"""
+        trace = self.enabled and self.trace_memory
+        if trace:
+            tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - mem_before) if trace else 0
+            timings[name] = (time.perf_counter() - wall_start, time.thread_time() - cpu_start, peak)
+
+    def record(self, name, wall_s, cpu_s=0.0, peak_bytes=0):
+        """Запись этапа, замеренного в другом месте (например, в фоновом потоке)"""
+        if not self.enabled:
+            return
+        # Процессорное время другого потока входит в итог изображения отдельно
+        self._image_cpu += cpu_s
+        self._image_peak = max(self._image_peak, peak_bytes)
+        self._write({
+            'image': self._image,
+            'stage': name,
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+            'peak_bytes': peak_bytes,
+            **self._params,
+        })
+
+    def end_image(self):
+        """Завершение изображения: итоговая запись со stage='total'"""
+        if not self.enabled or self._image_start is None:
+            return
+        wall_start, cpu_start = self._image_start
+        self._write({
+            'image': self._image,
+            'stage': 'total',
+            'wall_s': time.perf_counter() - wall_start,
+            'cpu_s': time.thread_time() - cpu_start + self._image_cpu,
+            'peak_bytes': self._image_peak,
+            **self._params,
+        })
+        self._image = None
+        self._params = {}
+        self._image_start = None
+
+    def close(self):
+        """Остановка tracemalloc, если он был запущен профилировщиком"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _write(self, record):
+        self.records.append(record)
+        # Дописываем сразу, чтобы при аварийном завершении замеры не терялись
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_records(path):
+    """Чтение записей из файла JSON lines"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) с линейной интерполяцией"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(records, percentiles=(50, 90, 99)):
+    """Сводка по этапам: перцентили времени и памяти по всему пакету"""
+    by_stage = {}
+    for rec in records:
+        by_stage.setdefault(rec['stage'], []).append(rec)
+
+    summary = {}
+    for stage, recs in by_stage.items():
+        row = {'count': len(recs)}
+        for key in ('wall_s', 'cpu_s', 'peak_bytes'):
+            values = [r[key] for r in recs]
+            for q in percentiles:
+                row[f'{key}_p{q}'] = percentile(values, q)
+            row[f'{key}_max'] = max(values)
+        summary[stage] = row
+    return summary
+
+
+def print_summary(summary):
+    """Вывод сводки в виде таблицы"""
+    print("\n" + "=" * 78)
+    print("СВОДКА ПО ЭТАПАМ ОБРАБОТКИ")
+    print("=" * 78)
+    print(f"{'Этап':<16} {'N':>5} {'wall p50':>10} {'wall p90':>10} {'wall p99':>10} "
+          f"{'cpu p50':>10} {'пам. p90':>12}")
+    print("-" * 78)
+    for stage, row in summary.items():
+        print(f"{stage:<16} {row['count']:5d} "
+              f"{row['wall_s_p50'] * 1000:8.1f}мс {row['wall_s_p90'] * 1000:8.1f}мс "
+              f"{row['wall_s_p99'] * 1000:8.1f}мс {row['cpu_s_p50'] * 1000:8.1f}мс "
+              f"{row['peak_bytes_p90'] / 1024:9.1f} КБ")
+    print("-" * 78)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or not os.path.isfile(sys.argv[1]):
+        print("Использование: python instrumentation.py метрики.jsonl")
+        sys.exit(1)
+    print_summary(summarize(load_records(sys.argv[1])))
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def integral_image(img_array):
+    """Интегральное изображение (summed-area table) размера (H+1)x(W+1).
+
+    sat[i, j] - сумма яркости прямоугольника [0, i) x [0, j),
+    поэтому сумма любого блока считается за четыре обращения к таблице.
+    """
+    height, width = img_array.shape
+    sat = np.zeros((height + 1, width + 1), dtype=np.int64)
+    np.cumsum(img_array, axis=0, dtype=np.int64, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    return sat
+
+
+def block_sums(sat, top, left, h, w):
+    """Суммы блоков h x w с левыми верхними углами (top, left).
+
+    top и left - массивы одинаковой формы (или приводимые друг к другу),
+    результат имеет ту же форму.
+    """
+    top = np.asarray(top)
+    left = np.asarray(left)
+    return (sat[top + h, left + w] - sat[top, left + w]
+            - sat[top + h, left] + sat[top, left])
+
+
+def _positions(size, window, step, axis_name):
+    if window > size:
+        raise ValueError(f"Размер блока {window} больше размера изображения по оси {axis_name} ({size}).")
+    return np.arange(0, size - window + 1, step)
+
+
+def mu1_blocks(img_array, h, w, dy, dx, axis='x', sat=None):
+    """μ1 по блокам h x w с шагами dy, dx по обеим осям.
+
+    axis='x' - разность правой и левой половин блока (как в apply_filter),
+    axis='y' - разность нижней и верхней половин.
+    Размер блока вдоль оси разности должен быть кратен 4.
+
+    Возвращает (yc, xc, values): центры блоков по y (Ny), по x (Nx)
+    и матрицу значений Ny x Nx.
+    """
+    if axis not in ('x', 'y'):
+        raise ValueError("axis должно быть 'x' или 'y'.")
+    size = w if axis == 'x' else h
+    if size <= 0 or size % 4 != 0:
+        raise ValueError("Размер блока вдоль оси разности должен быть положительным и кратным 4.")
+    if h <= 0 or w <= 0 or dy <= 0 or dx <= 0:
+        raise ValueError("Размеры блока и шаги должны быть положительными.")
+
+    if sat is None:
+        sat = integral_image(img_array)
+    height, width = sat.shape[0] - 1, sat.shape[1] - 1
+
+    tops = _positions(height, h, dy, 'y')[:, None]
+    lefts = _positions(width, w, dx, 'x')[None, :]
+
+    if axis == 'x':
+        half = w // 2
+        values = block_sums(sat, tops, lefts + half, h, half) - block_sums(sat, tops, lefts, h, half)
+    else:
+        half = h // 2
+        values = block_sums(sat, tops + half, lefts, half, w) - block_sums(sat, tops, lefts, half, w)
+
+    yc = tops[:, 0] + h / 2
+    xc = lefts[0, :] + w / 2
+    return yc, xc, values
+
+
+def mu1_vertical(img_array, h, dy, sat=None):
+    """Вертикальный профиль μ1(y): окно из h строк на всю ширину изображения"""
+    width = img_array.shape[1] if sat is None else sat.shape[1] - 1
+    yc, _, values = mu1_blocks(img_array, h, width, dy, 1, axis='y', sat=sat)
+    return yc, values[:, 0]
+
+
+def mu1_horizontal(img_array, w, dx, sat=None):
+    """Горизонтальный профиль μ1(x) на всю высоту (совпадает с apply_filter)"""
+    height = img_array.shape[0] if sat is None else sat.shape[0] - 1
+    _, xc, values = mu1_blocks(img_array, height, w, 1, dx, axis='x', sat=sat)
+    return xc, values[0]
@@ -0,0 +1,224 @@
+import os
+
+import numpy as np
+
+import median_filter
+import mu1_engine
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class NumpyBackend:
+    """Ядра на NumPy: суммы столбцов, префиксные суммы, векторный поиск экстремумов"""
+
+    name = 'numpy'
+
+    def __init__(self, workers=None):
+        # Потоки для сумм столбцов одного большого изображения (None - по числу ядер)
+        self.workers = workers
+
+    def mu1(self, img_array, w, d):
+        """Профиль μ1: (x, y)"""
+        return mu1_engine.mu1_profile(img_array, w, d, self.workers)
+
+    def extrema(self, y, threshold=0.3):
+        """Маски границ (peaks, valleys) по правилу find_boundaries"""
+        return mu1_engine.find_extrema(y, threshold)
+
+    def median(self, img_array, radius):
+        """Медианный фильтр окном (2*radius+1)^2 по гистограммам"""
+        return median_filter.median_filter(img_array, radius)
+
+    def mu1_with_extrema(self, img_array, w, d, threshold=0.3):
+        """Профиль и границы: (x, y, peaks, valleys)"""
+        x, y = self.mu1(img_array, w, d)
+        peaks, valleys = self.extrema(y, threshold)
+        return x, y, peaks, valleys
+
+
+if numba is not None:
+
+    @numba.njit(cache=True, nogil=True)
+    def _column_sums(img, cols):
+        height, width = img.shape
+        # Обход по строкам - последовательный доступ к памяти
+        for r in range(height):
+            for c in range(width):
+                cols[c] += img[r, c]
+        return cols
+
+    @numba.njit(cache=True)
+    def _sliding_mu1(cols, w, d):
+        width = cols.shape[0]
+        n = (width - w) // d + 1
+        half = w // 2
+        y = np.empty(n, dtype=np.int64)
+        left_sum = 0
+        right_sum = 0
+        for c in range(half):
+            left_sum += cols[c]
+        for c in range(half, w):
+            right_sum += cols[c]
+        y[0] = right_sum - left_sum
+        # Сдвиг окна на d столбцов: по четыре обновления на столбец
+        for i in range(1, n):
+            for c in range((i - 1) * d, i * d):
+                left_sum += cols[c + half] - cols[c]
+                right_sum += cols[c + w] - cols[c + half]
+            y[i] = right_sum - left_sum
+        return y
+
+    @numba.njit(cache=True)
+    def _extrema(y, threshold):
+        n = y.shape[0]
+        peaks = np.zeros(n, dtype=np.bool_)
+        valleys = np.zeros(n, dtype=np.bool_)
+        if n < 3:
+            return peaks, valleys
+        y_max = y[0]
+        y_min = y[0]
+        for i in range(1, n):
+            if y[i] > y_max:
+                y_max = y[i]
+            if y[i] < y_min:
+                y_min = y[i]
+        hi = y_max * threshold
+        lo = y_min * threshold
+        for i in range(1, n - 1):
+            if y[i] > y[i - 1] and y[i] > y[i + 1] and y[i] > hi:
+                peaks[i] = True
+            if y[i] < y[i - 1] and y[i] < y[i + 1] and y[i] < lo:
+                valleys[i] = True
+        return peaks, valleys
+
+    # Без дискового кэша: сохраненная версия ссылается на ядра выше по имени
+    # модуля и не загружается, если модуль импортирован под другим именем
+    @numba.njit
+    def _fused(img, cols, w, d, threshold):
+        cols = _column_sums(img, cols)
+        y = _sliding_mu1(cols, w, d)
+        peaks, valleys = _extrema(y, threshold)
+        return y, peaks, valleys
+
+
+    @numba.njit(cache=True, nogil=True)
+    def _median(img, radius):
+        height, width = img.shape
+        size = 2 * radius + 1
+        half = size * size // 2
+        n = width + 2 * radius
+        out = np.empty((height, width), dtype=np.uint8)
+        # Гистограммы столбцов (с повтором крайних пикселей) и гистограмма окна
+        hist = np.zeros((n, 256), dtype=np.int32)
+        window = np.zeros(256, dtype=np.int32)
+        for r in range(-radius, radius + 1):
+            rr = min(max(r, 0), height - 1)
+            for c in range(n):
+                hist[c, img[rr, min(max(c - radius, 0), width - 1)]] += 1
+        for r in range(height):
+            if r:
+                r_old = max(r - 1 - radius, 0)
+                r_new = min(r + radius, height - 1)
+                for c in range(n):
+                    cc = min(max(c - radius, 0), width - 1)
+                    hist[c, img[r_old, cc]] -= 1
+                    hist[c, img[r_new, cc]] += 1
+            window[:] = 0
+            for c in range(size):
+                for v in range(256):
+                    window[v] += hist[c, v]
+            for c in range(width):
+                if c:
+                    # Сдвиг окна на столбец: 256 сложений независимо от радиуса
+                    for v in range(256):
+                        window[v] += hist[c + 2 * radius, v] - hist[c - 1, v]
+                total = 0
+                for v in range(256):
+                    total += window[v]
+                    if total > half:
+                        out[r, c] = v
+                        break
+        return out
+
+
+class NumbaBackend(NumpyBackend):
+    """Ядра, скомпилированные Numba: один проход по изображению для сумм столбцов,
+    скользящие суммы половин окна и поиск экстремумов без временных массивов.
+    Первый вызов компилирует ядра (простые ядра кэшируются на диске)."""
+
+    name = 'numba'
+
+    def __init__(self, workers=None):
+        if numba is None:
+            raise ImportError("Numba не установлена (pip install numba).")
+        super().__init__(workers)
+
+    @staticmethod
+    def _strip_sums(block, dtype):
+        """Суммы столбцов полосы в ядре Numba (без GIL)"""
+        return _column_sums(block, np.zeros(block.shape[1], dtype=dtype))
+
+    def _columns(self, img_array):
+        return mu1_engine.strip_reduce(np.ascontiguousarray(img_array), self._strip_sums, self.workers)
+
+    def mu1(self, img_array, w, d):
+        mu1_engine.validate_params(w, d)
+        width = img_array.shape[1]
+        left = mu1_engine.window_positions(width, w, d)
+        return left + w / 2, _sliding_mu1(self._columns(img_array), w, d)
+
+    def extrema(self, y, threshold=0.3):
+        y = np.asarray(y)
+        if y.ndim != 1:
+            return super().extrema(y, threshold)
+        return _extrema(np.ascontiguousarray(y, dtype=np.int64), threshold)
+
+    def median(self, img_array, radius):
+        median_filter.validate_radius(radius)
+        if img_array.dtype != np.uint8:
+            raise ValueError("Медианный фильтр по гистограммам работает только с uint8.")
+        return _median(np.ascontiguousarray(img_array), radius)
+
+    def mu1_with_extrema(self, img_array, w, d, threshold=0.3):
+        mu1_engine.validate_params(w, d)
+        width = img_array.shape[1]
+        left = mu1_engine.window_positions(width, w, d)
+        if mu1_engine.strip_count(img_array, self.workers) > 1:
+            # Большое изображение: суммы столбцов полосами в потоках, дальше - по профилю
+            y = _sliding_mu1(self._columns(img_array), w, d)
+            peaks, valleys = _extrema(y, threshold)
+        else:
+            cols = np.zeros(width, dtype=mu1_engine.sum_dtype(img_array))
+            y, peaks, valleys = _fused(np.ascontiguousarray(img_array), cols, w, d, threshold)
+        return left + w / 2, y, peaks, valleys
+
+
+BACKENDS = {
+    'numpy': NumpyBackend,
+    'numba': NumbaBackend,
+}
+
+
+def get_backend(name=None, workers=None):
+    """Выбор ядер: 'numpy', 'numba' или 'auto' (по умолчанию).
+
+    Без явного имени используется переменная окружения MU1_BACKEND.
+    'auto' выбирает Numba, если она установлена. Если Numba запрошена,
+    но недоступна, выдается предупреждение и используется NumPy.
+    workers - потоки для сумм столбцов одного изображения (None - авто).
+    """
+    if name is None:
+        name = os.environ.get('MU1_BACKEND', 'auto')
+    name = name.lower()
+    if name == 'auto':
+        name = 'numba' if numba is not None else 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестные ядра: {name}. Доступны: auto, {', '.join(BACKENDS)}")
+    try:
+        return BACKENDS[name](workers)
+    except ImportError as e:
+        print(f"Предупреждение: {e} Используются ядра NumPy.")
+        return NumpyBackend(workers)
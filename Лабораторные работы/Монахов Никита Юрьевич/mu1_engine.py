@@ -0,0 +1,203 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Изображения меньше этого числа пикселей суммируются в одном потоке:
+# запуск пула дороже выигрыша от параллельности
+PARALLEL_MIN_PIXELS = 1 << 24
+
+# Маски фильтров активного восприятия: знаки четырех четвертей окна ширины w.
+# mu1 - разность правой и левой половин (тот же знак, что в apply_filter),
+# то есть маска (++--) с противоположным знаком.
+FILTER_BANK = {
+    'mu0': (1, 1, 1, 1),
+    'mu1': (-1, -1, 1, 1),
+    'mu2': (1, -1, -1, 1),
+    'mu3': (1, -1, 1, -1),
+}
+
+
+def validate_params(w, d):
+    """Проверка параметров фильтра"""
+    if not isinstance(w, (int, np.integer)) or w <= 0 or w % 4 != 0:
+        raise ValueError("w должно быть положительным целым числом, кратным 4.")
+    if not isinstance(d, (int, np.integer)) or d <= 0:
+        raise ValueError("d должно быть положительным целым числом (> 0).")
+
+
+def pixel_max(img_array):
+    """Наибольшее возможное значение пикселя по типу массива.
+
+    Для bool и беззнаковых целых - предел типа (255 для uint8),
+    для знаковых и дробных типов оценки нет (None).
+    """
+    if img_array.dtype == np.bool_:
+        return 1
+    if np.issubdtype(img_array.dtype, np.unsignedinteger):
+        return int(np.iinfo(img_array.dtype).max)
+    return None
+
+
+def accumulator_dtype(bound):
+    """Самый узкий знаковый целый тип, вмещающий любое значение с модулем <= bound"""
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def column_dtype(bound):
+    """Тип сумм столбцов с оценкой сверху bound: uint16, если хватает, иначе знаковый"""
+    if bound <= np.iinfo(np.uint16).max:
+        return np.dtype(np.uint16)
+    return accumulator_dtype(bound)
+
+
+def sum_dtype(img_array, rows=None):
+    """Тип сумм столбцов по rows строкам изображения (по умолчанию - по всем)"""
+    vmax = pixel_max(img_array)
+    rows = img_array.shape[0] if rows is None else rows
+    return np.dtype(np.int64) if vmax is None else column_dtype(rows * vmax)
+
+
+def strip_count(img_array, workers=None):
+    """Число полос строк для параллельного суммирования.
+
+    workers=None - число ядер, но только для изображений от
+    PARALLEL_MIN_PIXELS пикселей; 1 - в одном потоке.
+    """
+    if workers is None:
+        workers = (os.cpu_count() or 1) if img_array.size >= PARALLEL_MIN_PIXELS else 1
+    return max(1, min(workers, img_array.shape[0]))
+
+
+def strip_reduce(img_array, reduce, workers=None):
+    """Суммы столбцов по полосам строк в пуле потоков.
+
+    reduce(block, dtype) считает суммы столбцов полосы в заданном типе
+    (NumPy и ядра Numba с nogil отпускают GIL, поэтому полосы считаются
+    одновременно). Тип полосы выбирается по ее высоте, итог - по высоте
+    изображения; частичные суммы складываются в порядке полос, так что
+    для целых пикселей результат совпадает с однопоточным.
+    """
+    height = img_array.shape[0]
+    total_dtype = sum_dtype(img_array)
+    strips = strip_count(img_array, workers)
+    if strips == 1:
+        return reduce(img_array, total_dtype)
+
+    bounds = np.linspace(0, height, strips + 1).astype(np.int64)
+    blocks = [img_array[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    with ThreadPoolExecutor(max_workers=strips, thread_name_prefix='strips') as pool:
+        parts = list(pool.map(lambda block: reduce(block, sum_dtype(block)), blocks))
+    total = np.zeros(img_array.shape[1], dtype=total_dtype)
+    for part in parts:
+        total += part
+    return total
+
+
+def column_sums(img_array, workers=None):
+    """Суммы яркости по столбцам изображения.
+
+    Тип накопителя выбирается по оценке height * pixel_max: для uint8
+    до 257 строк хватает uint16, до 8 миллионов строк - int32. int64
+    нужен только сверх этого и для пикселей без оценки (знаковых, дробных).
+    Большие изображения суммируются полосами в нескольких потоках
+    (см. strip_reduce).
+    """
+    return strip_reduce(img_array, lambda block, dtype: block.sum(axis=0, dtype=dtype), workers)
+
+
+def prefix_sums(col_sums, bound=None):
+    """Префиксные суммы: prefix[i] - сумма столбцов [0, i).
+
+    Тип - самый узкий знаковый, вмещающий bound, оценку сверху суммы
+    модулей всех столбцов (по умолчанию считается точно по col_sums).
+    Разность префиксов - сумма подряд идущих столбцов, а μ1 и фильтры
+    банка - разности сумм непересекающихся диапазонов, поэтому их модуль
+    тоже не больше bound и переполнения в этом типе нет.
+    """
+    if bound is None:
+        bound = int(np.abs(col_sums).sum(dtype=np.int64))
+    dtype = accumulator_dtype(bound)
+    prefix = np.zeros(len(col_sums) + 1, dtype=dtype)
+    np.cumsum(col_sums, dtype=dtype, out=prefix[1:])
+    return prefix
+
+
+def window_positions(width, w, d):
+    """Левые края окон: 0, d, 2d, ... пока окно помещается в изображение"""
+    if w > width:
+        raise ValueError(f"w={w} больше ширины изображения ({width}).")
+    return np.arange(0, width - w + 1, d)
+
+
+def quarter_sums(prefix, left, w):
+    """Суммы яркости четырех четвертей каждого окна, матрица 4xN"""
+    q = w // 4
+    edges = left[None, :] + q * np.arange(5)[:, None]
+    bounds = prefix[edges]
+    return bounds[1:] - bounds[:-1]
+
+
+def mu1_profile(img_array, w, d, workers=None):
+    """μ1(x) за один проход по суммам столбцов, возвращает (x, y)"""
+    validate_params(w, d)
+    width = img_array.shape[1]
+    left = window_positions(width, w, d)
+    prefix = prefix_sums(column_sums(img_array, workers))
+    half = w // 2
+    y = (prefix[left + w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+    x = left + w / 2
+    return x, y
+
+
+def filter_bank(img_array, w, d, names=None, workers=None):
+    """Банк фильтров по четвертям окна за один проход.
+
+    Возвращает (x, features, names), где features - матрица FxN:
+    строка i - профиль фильтра names[i] во всех N позициях окна.
+    Все фильтры строятся из одних и тех же сумм четвертей, поэтому
+    каждый дополнительный фильтр стоит одного умножения матрицы 1x4 на 4xN.
+    """
+    validate_params(w, d)
+    if names is None:
+        names = list(FILTER_BANK)
+    unknown = [name for name in names if name not in FILTER_BANK]
+    if unknown:
+        raise ValueError(f"Неизвестные фильтры: {', '.join(unknown)}")
+
+    width = img_array.shape[1]
+    left = window_positions(width, w, d)
+    prefix = prefix_sums(column_sums(img_array, workers))
+    quarters = quarter_sums(prefix, left, w)
+
+    # Каждая строка банка - разность сумм непересекающихся четвертей,
+    # поэтому умещается в тип префиксных сумм
+    masks = np.array([FILTER_BANK[name] for name in names], dtype=quarters.dtype)
+    features = masks @ quarters
+    x = left + w / 2
+    return x, features, list(names)
+
+
+def find_extrema(y, threshold=0.3):
+    """Векторизованный поиск границ, эквивалентный find_boundaries.
+
+    Максимум в точке i - граница, если y[i] больше обоих соседей и больше
+    max(y) * threshold; минимум - если меньше обоих соседей и меньше
+    min(y) * threshold. Для матрицы поиск идет по каждой строке отдельно.
+    Возвращает булевы маски (peaks, valleys) той же формы, что y.
+    """
+    y = np.asarray(y)
+    peaks = np.zeros(y.shape, dtype=bool)
+    valleys = np.zeros(y.shape, dtype=bool)
+    if y.shape[-1] < 3:
+        return peaks, valleys
+
+    mid, prev, nxt = y[..., 1:-1], y[..., :-2], y[..., 2:]
+    y_max = y.max(axis=-1, keepdims=True)
+    y_min = y.min(axis=-1, keepdims=True)
+    peaks[..., 1:-1] = (mid > prev) & (mid > nxt) & (mid > y_max * threshold)
+    valleys[..., 1:-1] = (mid < prev) & (mid < nxt) & (mid < y_min * threshold)
+    return peaks, valleys
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+def window_count(width, w, d):
+    """Число позиций окна ширины w с шагом d: (width - w) // d + 1"""
+    if w > width:
+        return 0
+    return (width - w) // d + 1
+
+
+class Mu1Result:
+    """Результат μ1 для одного изображения (страницы) без ссылок на пиксели.
+
+    Массивы выделяются один раз точно по числу позиций окна: x - float32
+    (центры окон - целые или половинки, в float32 они точны), y - int64,
+    peaks и valleys - булевы маски границ и минимумов. Метаданные - только
+    имя, размер и параметры, поэтому тысячи результатов можно держать
+    в памяти для сводной обработки. __slots__ убирает словарь атрибутов.
+
+    Если ширина изображения неизвестна (width=None, например результат
+    прочитан из CSV), число позиций задается явно через points.
+    """
+
+    __slots__ = ('x', 'y', 'peaks', 'valleys', 'name', 'filename',
+                 'width', 'height', 'page', 'pages', 'w', 'd', 'threshold')
+
+    def __init__(self, name, filename, width, height, w, d, page=0, pages=1, threshold=0.3,
+                 points=None):
+        n = window_count(width, w, d) if points is None else points
+        self.x = np.empty(n, dtype=np.float32)
+        self.y = np.empty(n, dtype=np.int64)
+        self.peaks = np.zeros(n, dtype=bool)
+        self.valleys = np.zeros(n, dtype=bool)
+        self.name = name
+        self.filename = filename
+        self.width = width
+        self.height = height
+        self.page = page
+        self.pages = pages
+        self.w = w
+        self.d = d
+        self.threshold = threshold
+
+    @classmethod
+    def for_image(cls, image_data, w, d, threshold=0.3):
+        """Пустой результат по записи изображения анализатора"""
+        return cls(image_data['name'], image_data['filename'], image_data['width'],
+                   image_data['height'], w, d, image_data['page'], image_data['pages'], threshold)
+
+    def fill(self, x, y, peaks, valleys):
+        """Копирование профиля и масок в выделенные массивы.
+
+        peaks и valleys - булевы маски или массивы индексов.
+        """
+        if len(y) != len(self.y):
+            raise ValueError(f"Ожидалось {len(self.y)} позиций окна, получено {len(y)}.")
+        self.x[:] = x
+        self.y[:] = y
+        for mask, marks in ((self.peaks, peaks), (self.valleys, valleys)):
+            marks = np.asarray(marks)
+            if marks.dtype == bool:
+                mask[:] = marks
+            else:
+                mask[:] = False
+                mask[marks] = True
+        return self
+
+    @property
+    def peak_indices(self):
+        return np.flatnonzero(self.peaks)
+
+    @property
+    def valley_indices(self):
+        return np.flatnonzero(self.valleys)
+
+    @property
+    def nbytes(self):
+        """Память под массивы результата"""
+        return self.x.nbytes + self.y.nbytes + self.peaks.nbytes + self.valleys.nbytes
+
+    def __len__(self):
+        return len(self.y)
+
+    def __repr__(self):
+        return (f"Mu1Result({self.name!r}, w={self.w}, d={self.d}, позиций={len(self)}, "
+                f"границ={int(self.peaks.sum())})")
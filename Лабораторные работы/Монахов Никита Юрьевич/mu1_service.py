@@ -0,0 +1,397 @@
+import argparse
+import hashlib
+import importlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import image_io
+import kernels
+import mu1_engine
+import mu1_result
+
+# Границы корзин гистограммы задержек, с (последняя корзина +Inf)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Наибольший размер загружаемого изображения и число точек y(x) лабораторной №1
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+MAX_LAB1_SAMPLES = 10 ** 7
+
+
+class LruCache:
+    """Потокобезопасный LRU-кэш с ограничением по объему (байтам)"""
+
+    def __init__(self, capacity_bytes):
+        self.capacity = capacity_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()   # ключ -> (значение, байт)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key):
+        """Значение без учета в статистике и без изменения порядка"""
+        with self._lock:
+            entry = self._items.get(key)
+            return None if entry is None else entry[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            if nbytes > self.capacity:
+                return
+            self._items[key] = (value, nbytes)
+            self.size += nbytes
+            # Вытесняем давно не использованные записи
+            while self.size > self.capacity:
+                _, (_, freed) = self._items.popitem(last=False)
+                self.size -= freed
+
+    def __len__(self):
+        return len(self._items)
+
+
+class LatencyHistogram:
+    """Гистограммы задержек запросов по адресам (формат Prometheus)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series = {}    # (адрес, код) -> [счетчики корзин..., сумма, количество]
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, status, seconds):
+        index = np.searchsorted(self.buckets, seconds)
+        with self._lock:
+            series = self._series.setdefault((endpoint, status), [0] * (len(self.buckets) + 1) + [0.0, 0])
+            series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self, name='mu1_request_duration_seconds'):
+        lines = [f"# HELP {name} Время обработки запроса, с",
+                 f"# TYPE {name} histogram"]
+        with self._lock:
+            for (endpoint, status), series in sorted(self._series.items()):
+                labels = f'endpoint="{endpoint}",status="{status}"'
+                total = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series):
+                    total += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+                lines.append(f"{name}_sum{{{labels}}} {series[-2]:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class CachedImage:
+    """Декодированное изображение и префиксные суммы его столбцов"""
+
+    __slots__ = ('array', 'prefix', 'name')
+
+    def __init__(self, array, name):
+        self.array = array
+        self.prefix = None
+        self.name = name
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes + (0 if self.prefix is None else self.prefix.nbytes)
+
+
+class Mu1Service:
+    """Расчет μ1 и y(x) лабораторной №1 с кэшем декодированных изображений.
+
+    Изображения кэшируются вместе с префиксными суммами столбцов, поэтому
+    повторный запрос с другими w и d не декодирует файл и не проходит по
+    пикселям: профиль строится по префиксным суммам за O(число окон).
+    Ключ кэша - путь, размер и mtime файла (для загрузок - SHA-1 содержимого)
+    и масштаб уменьшения. Файлы на сервере берутся только из папки root.
+    Одновременные запросы одного еще не кэшированного изображения ждут
+    одного общего декодирования.
+    """
+
+    def __init__(self, root, cache_bytes=512 * 1024 * 1024, backend=None, threshold=0.3):
+        self.root = os.path.realpath(root)
+        self.cache = LruCache(cache_bytes)
+        self.backend = kernels.get_backend(backend)
+        self.threshold = threshold
+        self.latency = LatencyHistogram()
+        self._lab1 = None
+        self._loading = {}    # ключ -> Future идущего декодирования
+        self._loading_lock = threading.Lock()
+
+    def resolve(self, path):
+        """Путь к файлу внутри root (иначе PermissionError)"""
+        full = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([full, self.root]) != self.root:
+            raise PermissionError(f"Путь вне разрешенной папки: {path}")
+        if not os.path.isfile(full):
+            raise FileNotFoundError(f"Файл не найден: {path}")
+        return full
+
+    def image_from_path(self, path, scale=1):
+        full = self.resolve(path)
+        st = os.stat(full)
+        key = ('path', full, st.st_size, st.st_mtime_ns, scale)
+        return self._cached(key, lambda: image_io.load_grayscale(full, scale)[0],
+                            os.path.basename(full))
+
+    def image_from_bytes(self, data, scale=1, name='upload'):
+        key = ('upload', hashlib.sha1(data).hexdigest(), scale)
+        return self._cached(key, lambda: image_io.load_grayscale(io.BytesIO(data), scale)[0], name)
+
+    def _cached(self, key, load, name):
+        """(CachedImage, был ли в кэше или уже декодировался другим запросом)"""
+        image = self.cache.get(key)
+        if image is not None:
+            return image, True
+        with self._loading_lock:
+            image = self.cache.peek(key)
+            if image is not None:
+                return image, True
+            pending = self._loading.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._loading[key] = Future()
+        if not owner:
+            return pending.result(), True
+        try:
+            image = CachedImage(load(), name)
+            image.prefix = mu1_engine.prefix_sums(mu1_engine.column_sums(image.array, self.backend.workers))
+            self.cache.put(key, image, image.nbytes)
+            pending.set_result(image)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._loading_lock:
+                del self._loading[key]
+        return image, False
+
+    def mu1(self, image, w, d, threshold=None):
+        """Профиль и границы по префиксным суммам кэшированного изображения"""
+        threshold = self.threshold if threshold is None else threshold
+        mu1_engine.validate_params(w, d)
+        height, width = image.array.shape
+        left = mu1_engine.window_positions(width, w, d)
+        prefix, half = image.prefix, w // 2
+        y = (prefix[left + w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+        peaks, valleys = self.backend.extrema(y, threshold)
+        result = mu1_result.Mu1Result(image.name, image.name, width, height, w, d, threshold=threshold)
+        return result.fill(left + w / 2, y, peaks, valleys)
+
+    def lab1(self, coefficients, x0, xk, dx):
+        """Таблица y(x) лабораторной №1 (функция calculate_y_values)"""
+        if dx <= 0:
+            raise ValueError("Шаг dx должен быть положительным.")
+        if (xk - x0) / dx + 1 > MAX_LAB1_SAMPLES:
+            raise ValueError(f"Слишком много точек (больше {MAX_LAB1_SAMPLES}).")
+        if self._lab1 is None:
+            self._lab1 = importlib.import_module('МиСОС_22_ВМз_Монахов_НЮ_ЛР_1')
+        # Та же сетка, что в main() лабораторной
+        x = np.arange(x0, xk + dx, dx)
+        return x, self._lab1.calculate_y_values(x, coefficients)
+
+    def metrics(self):
+        """Текст для /metrics"""
+        lines = self.latency.render()
+        lines += ["# TYPE mu1_cache_hits_total counter", f"mu1_cache_hits_total {self.cache.hits}",
+                  "# TYPE mu1_cache_misses_total counter", f"mu1_cache_misses_total {self.cache.misses}",
+                  "# TYPE mu1_cache_bytes gauge", f"mu1_cache_bytes {self.cache.size}",
+                  "# TYPE mu1_cache_entries gauge", f"mu1_cache_entries {len(self.cache)}"]
+        return "\n".join(lines) + "\n"
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class Mu1RequestHandler(BaseHTTPRequestHandler):
+    """Адреса службы:
+
+      GET  /mu1?path=ФАЙЛ&w=32&d=1      - файл из папки root
+      POST /mu1?w=32&d=1                - изображение в теле запроса
+      GET  /lab1?a1=..&b1=..&..&b3=..&x0=..&xk=..&dx=..
+      GET  /metrics                     - гистограммы задержек и кэш
+
+    Необязательные параметры: scale (1, 2, 4, 8), threshold, format=json|binary.
+    Двоичный ответ /mu1: x (float32), y (int64), метки (int8: 1 - граница,
+    -1 - минимум) подряд, число точек - в заголовке X-Points. Двоичный
+    ответ /lab1: x и y (float64) подряд.
+
+    Соединение читается своим потоком, а расчет и подготовка ответа
+    выполняются в ограниченном пуле сервера (server.compute): простаивающие
+    соединения keep-alive не занимают вычислительные потоки.
+    """
+
+    protocol_version = 'HTTP/1.1'   # соединение остается открытым между запросами
+    timeout = 30                    # простаивающее соединение закрывается
+    disable_nagle_algorithm = True  # заголовки и тело уходят без задержки подтверждения
+    service = None
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        routes = {('GET', '/mu1'): self._mu1, ('POST', '/mu1'): self._mu1,
+                  ('GET', '/lab1'): self._lab1, ('GET', '/metrics'): self._metrics}
+        handler = routes.get((method, url.path))
+        try:
+            # Тело читается до разбора параметров: иначе его остаток попал бы
+            # в следующий запрос того же соединения
+            self.body = self._read_body() if method == 'POST' else b''
+            if handler is None:
+                status = self._send_json(404, {'error': f"Неизвестный адрес: {method} {url.path}"})
+            else:
+                status = self._send(*self.server.compute.submit(handler, query).result())
+        except UploadTooLarge as e:
+            self.close_connection = True
+            status = self._send_json(413, {'error': str(e)})
+        except PermissionError as e:
+            status = self._send_json(403, {'error': str(e)})
+        except FileNotFoundError as e:
+            status = self._send_json(404, {'error': str(e)})
+        except (ValueError, KeyError, OSError) as e:
+            message = f"Не указан параметр {e}" if isinstance(e, KeyError) else str(e)
+            status = self._send_json(400, {'error': message})
+        except Exception as e:
+            status = self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+        endpoint = url.path if handler is not None else 'other'
+        self.service.latency.observe(endpoint, status, time.perf_counter() - start)
+
+    def _mu1(self, query):
+        service = self.service
+        w, d = int(query['w']), int(query['d'])
+        scale = int(query.get('scale', 1))
+        threshold = float(query['threshold']) if 'threshold' in query else None
+        if self.command == 'POST':
+            if not self.body:
+                raise ValueError("Пустое тело запроса: ожидалось изображение.")
+            image, cached = service.image_from_bytes(self.body, scale, query.get('name', 'upload'))
+        else:
+            image, cached = service.image_from_path(query['path'], scale)
+        result = service.mu1(image, w, d, threshold)
+
+        if query.get('format') == 'binary':
+            marks = result.peaks.astype(np.int8) - result.valleys.astype(np.int8)
+            body = result.x.tobytes() + result.y.tobytes() + marks.tobytes()
+            return (200, body, 'application/octet-stream',
+                    {'X-Points': str(len(result)), 'X-Cached': str(int(cached))})
+        return self._json(200, {
+            'name': result.name, 'width': result.width, 'height': result.height,
+            'w': w, 'd': d, 'threshold': result.threshold, 'cached': cached,
+            'x': result.x.tolist(), 'y': result.y.tolist(),
+            'peaks': result.peak_indices.tolist(), 'valleys': result.valley_indices.tolist(),
+        })
+
+    def _lab1(self, query):
+        coefficients = tuple(float(query[k]) for k in ('a1', 'b1', 'a2', 'b2', 'a3', 'b3'))
+        x, y = self.service.lab1(coefficients, float(query['x0']), float(query['xk']), float(query['dx']))
+        if query.get('format') == 'binary':
+            return (200, x.astype(np.float64).tobytes() + y.astype(np.float64).tobytes(),
+                    'application/octet-stream', {'X-Points': str(len(x))})
+        return self._json(200, {'x': x.tolist(), 'y': y.tolist()})
+
+    def _metrics(self, query):
+        return 200, self.service.metrics().encode('utf-8'), 'text/plain; version=0.0.4'
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        if length > MAX_UPLOAD_BYTES:
+            raise UploadTooLarge(f"Тело запроса больше {MAX_UPLOAD_BYTES} байт.")
+        return self.rfile.read(length) if length > 0 else b''
+
+    @staticmethod
+    def _json(status, payload):
+        """(код, тело, тип) JSON-ответа"""
+        return status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+
+    def _send_json(self, status, payload):
+        return self._send(*self._json(status, payload))
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+    def log_message(self, format, *args):
+        # Журнал каждого запроса замедляет службу; задержки видны в /metrics
+        pass
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """HTTP-сервер: поток на соединение, расчеты - в пуле из workers потоков"""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, workers=4):
+        super().__init__(address, handler)
+        self.compute = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mu1')
+
+    def server_close(self):
+        super().server_close()
+        self.compute.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(service, host='127.0.0.1', port=8765, workers=4):
+    """Сервер с обработчиком, привязанным к service"""
+    handler = type('BoundMu1Handler', (Mu1RequestHandler,), {'service': service})
+    return PooledHTTPServer((host, port), handler, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная служба расчета μ1 и y(x)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--root', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="папка, из которой разрешено читать файлы (по умолчанию - папка программы)")
+    parser.add_argument('--workers', type=int, default=4, help="потоков для расчетов (соединения читаются отдельными потоками)")
+    parser.add_argument('--cache-mb', type=int, default=512, help="объем кэша изображений, МБ")
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'numba'],
+                        help="вычислительные ядра (по умолчанию auto или MU1_BACKEND)")
+    args = parser.parse_args()
+
+    service = Mu1Service(args.root, args.cache_mb * 1024 * 1024, args.backend)
+    server = make_server(service, args.host, args.port, args.workers)
+    print(f"Служба μ1: http://{args.host}:{server.server_address[1]} "
+          f"(файлы из {service.root}, ядра {service.backend.name}). Остановка - Ctrl+C")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nСлужба остановлена.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
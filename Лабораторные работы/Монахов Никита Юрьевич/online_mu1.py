@@ -0,0 +1,182 @@
+import argparse
+import time
+
+import numpy as np
+
+import mu1_engine
+
+
+class OnlineMu1:
+    """Потоковый фильтр μ1 для построчно-сканирующей камеры.
+
+    Изображение поступает по одному столбцу (или блоками столбцов).
+    В кольцевом буфере хранятся префиксные суммы яркости последних w+1
+    столбцов, поэтому каждое новое окно считается за O(1) по трем значениям
+    буфера, а значение μ1 выдается сразу после прихода последнего столбца окна.
+
+    Границы ищутся по тому же правилу, что в find_boundaries, но причинно:
+    экстремум подтверждается, когда пришло следующее значение, а порог
+    берется от максимума (минимума) μ1, накопленного к этому моменту.
+    Если задан absolute_threshold, используется фиксированный порог |y|.
+    """
+
+    def __init__(self, w, d, threshold=0.3, absolute_threshold=None):
+        mu1_engine.validate_params(w, d)
+        self.w = w
+        self.d = d
+        self.half = w // 2
+        self.threshold = threshold
+        self.absolute_threshold = absolute_threshold
+
+        self.columns = 0                     # сколько столбцов уже получено
+        self._ring = np.zeros(w + 1, dtype=np.int64)   # P[k] хранится в _ring[k % (w + 1)]
+        self.count = 0                       # сколько значений μ1 выдано
+        self._last_y = []                    # два последних значения μ1
+        self._last_x = []
+        self._y_max = None
+        self._y_min = None
+
+    def push(self, columns):
+        """Прием столбца (H,) или блока столбцов (H, k).
+
+        Возвращает (x, y, events): координаты и значения μ1 окон,
+        завершившихся в этом блоке, и список подтвержденных границ.
+        """
+        columns = np.asarray(columns)
+        if columns.ndim == 1:
+            sums = np.array([columns.sum(dtype=np.int64)])
+        else:
+            sums = columns.sum(axis=0, dtype=np.int64)
+        return self.push_sums(sums)
+
+    def push_sums(self, sums):
+        """Прием уже посчитанных сумм столбцов"""
+        sums = np.asarray(sums, dtype=np.int64)
+        k = len(sums)
+        t = self.columns
+        ring_size = self.w + 1
+        if k == 0:
+            return np.empty(0), np.empty(0, dtype=np.int64), []
+
+        # P[t+1..t+k]
+        new_prefix = self._ring[t % ring_size] + np.cumsum(sums)
+
+        # Правые края окон e в (t, t+k]: e >= w и (e - w) кратно d
+        first = max(t + 1, self.w)
+        offset = (first - self.w) % self.d
+        if offset:
+            first += self.d - offset
+        ends = np.arange(first, t + k + 1, self.d)
+
+        def prefix_at(idx):
+            from_ring = self._ring[idx % ring_size]
+            from_block = new_prefix[np.clip(idx - t - 1, 0, k - 1)]
+            return np.where(idx > t, from_block, from_ring)
+
+        y = ((prefix_at(ends) - prefix_at(ends - self.half))
+             - (prefix_at(ends - self.half) - prefix_at(ends - self.w)))
+        x = ends - self.w + self.w / 2
+
+        # Обновляем кольцевой буфер последними префиксными суммами
+        tail = min(k, ring_size)
+        idx = np.arange(t + k - tail + 1, t + k + 1)
+        self._ring[idx % ring_size] = new_prefix[k - tail:]
+        self.columns = t + k
+
+        events = self._detect(x, y)
+        self.count += len(y)
+        return x, y, events
+
+    def _detect(self, x, y):
+        """Подтверждение экстремумов с учетом двух предыдущих значений"""
+        if len(y) == 0:
+            return []
+        all_y = np.concatenate((np.array(self._last_y, dtype=np.int64), y))
+        all_x = np.concatenate((np.array(self._last_x, dtype=np.float64), x))
+        start = self.count - len(self._last_y)
+
+        events = []
+        if len(all_y) >= 3:
+            mid, prev, nxt = all_y[1:-1], all_y[:-2], all_y[2:]
+            if self.absolute_threshold is not None:
+                hi = np.full(len(mid), self.absolute_threshold)
+                lo = -hi
+            else:
+                # Максимум и минимум, известные к моменту подтверждения (после y[i+1])
+                run_max = np.maximum.accumulate(all_y)
+                run_min = np.minimum.accumulate(all_y)
+                if self._y_max is not None:
+                    run_max = np.maximum(run_max, self._y_max)
+                    run_min = np.minimum(run_min, self._y_min)
+                hi = run_max[2:] * self.threshold
+                lo = run_min[2:] * self.threshold
+            peaks = (mid > prev) & (mid > nxt) & (mid > hi)
+            valleys = (mid < prev) & (mid < nxt) & (mid < lo)
+            for i in np.flatnonzero(peaks | valleys):
+                events.append({
+                    'kind': 'peak' if peaks[i] else 'valley',
+                    'index': start + i + 1,
+                    'x': float(all_x[i + 1]),
+                    'y': int(mid[i]),
+                })
+
+        y_max, y_min = int(y.max()), int(y.min())
+        self._y_max = y_max if self._y_max is None else max(self._y_max, y_max)
+        self._y_min = y_min if self._y_min is None else min(self._y_min, y_min)
+        self._last_y = list(all_y[-2:])
+        self._last_x = list(all_x[-2:])
+        return events
+
+
+def synthetic_columns(height, width, block=1, seed=0, line_height=40, pitch=24):
+    """Генератор столбцов синтетической страницы (источник для проверки без камеры).
+
+    Выдает блоки uint8 размера height x block (последний может быть уже).
+    Символы - вертикальные штрихи в ячейках шириной pitch в текстовых строках.
+    """
+    rng = np.random.default_rng(seed)
+    rows = np.arange(height)
+    in_line = (rows % line_height >= line_height // 4) & (rows % line_height < line_height * 11 // 12)
+
+    n_cells = width // pitch + 1
+    offsets = rng.integers(0, pitch // 2, size=n_cells)
+    strokes = rng.integers(2, pitch // 3, size=n_cells)
+
+    for start in range(0, width, block):
+        cols = np.arange(start, min(width, start + block))
+        cell = cols // pitch
+        pos = cols % pitch
+        ink = (pos >= offsets[cell]) & (pos < offsets[cell] + strokes[cell])
+        chunk = rng.integers(215, 256, size=(height, len(cols)), dtype=np.uint8)
+        mask = in_line[:, None] & ink[None, :]
+        chunk[mask] = rng.integers(0, 60, size=int(mask.sum()), dtype=np.uint8)
+        yield chunk
+
+
+def main():
+    """Демонстрация: поток столбцов синтетической страницы"""
+    parser = argparse.ArgumentParser(description="Потоковый фильтр μ1 для построчного сканирования")
+    parser.add_argument('-w', type=int, default=32, help="ширина фильтра (кратна 4)")
+    parser.add_argument('-d', type=int, default=1, help="шаг фильтра")
+    parser.add_argument('--height', type=int, default=2048, help="высота столбца, пикселей")
+    parser.add_argument('--width', type=int, default=20000, help="число столбцов")
+    parser.add_argument('--block', type=int, default=1, help="столбцов в одном блоке")
+    args = parser.parse_args()
+
+    online = OnlineMu1(args.w, args.d)
+    latencies = []
+    peaks = 0
+    for chunk in synthetic_columns(args.height, args.width, args.block):
+        start = time.perf_counter()
+        _, _, events = online.push(chunk)
+        latencies.append(time.perf_counter() - start)
+        peaks += sum(1 for e in events if e['kind'] == 'peak')
+
+    latencies = np.array(latencies) * 1e6
+    print(f"Столбцов: {online.columns}, значений μ1: {online.count}, границ: {peaks}")
+    print(f"Задержка на блок: медиана {np.median(latencies):.1f} мкс, "
+          f"99% {np.percentile(latencies, 99):.1f} мкс, максимум {latencies.max():.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
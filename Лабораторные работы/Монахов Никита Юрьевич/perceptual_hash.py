@@ -0,0 +1,115 @@
+import numpy as np
+from PIL import Image
+
+import image_io
+
+# Число единичных битов в каждом байте (для NumPy без bitwise_count)
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def popcount(values):
+    """Число единичных битов в каждом элементе массива uint64"""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def dhash(img_array):
+    """64-битный разностный хэш: миниатюра 9x8, бит - "правый сосед светлее".
+
+    Хэш почти не меняется при пересканировании, сжатии и небольшом
+    изменении яркости, а разные страницы дают хэши, различающиеся
+    примерно в половине битов.
+    """
+    thumb = Image.fromarray(np.ascontiguousarray(img_array)).resize((9, 8), Image.BOX)
+    pixels = np.asarray(thumb, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+# Во сколько раз уменьшается изображение для подписи
+SIGNATURE_SCALE = 8
+
+
+def column_profile(small_array):
+    """Профиль сумм столбцов уменьшенного изображения без среднего, с единичной нормой"""
+    profile = small_array.mean(axis=0, dtype=np.float64)
+    profile -= profile.mean()
+    norm = np.linalg.norm(profile)
+    return (profile / norm if norm else profile).astype(np.float32)
+
+
+def signature(small_array, size):
+    """Подпись страницы по изображению, уменьшенному в SIGNATURE_SCALE раз:
+    (хэш, исходный размер, профиль столбцов)"""
+    return dhash(small_array), tuple(size), column_profile(small_array)
+
+
+def file_signature(path, frame=0):
+    """Подпись по уменьшенному при чтении изображению.
+
+    Для JPEG декодер сразу выдает изображение в 8 раз меньше (см. image_io),
+    поэтому такой проход намного дешевле полного чтения.
+    """
+    small, info = image_io.load_grayscale(path, SIGNATURE_SCALE, frame)
+    return signature(small, info['size'])
+
+
+def array_signature(img_array):
+    """Подпись по уже прочитанному изображению (уменьшение как в image_io для не-JPEG)"""
+    small = np.asarray(Image.fromarray(img_array).reduce(SIGNATURE_SCALE))
+    return signature(small, (img_array.shape[1], img_array.shape[0]))
+
+
+class HashIndex:
+    """Индекс хэшей обработанных страниц для поиска повторов.
+
+    Повтором считается страница того же размера, хэш которой отличается
+    от хэша уже обработанной не более чем в max_distance битах (0 - только
+    совпадающие миниатюры). Хэши хранятся в массиве uint64, поиск -
+    одна векторная операция XOR и подсчет битов по всему индексу.
+
+    Миниатюра 9x8 у разных страниц с одинаковой версткой может совпасть,
+    поэтому кандидат дополнительно проверяется по профилю сумм столбцов
+    уменьшенного изображения: корреляция должна быть не ниже min_correlation.
+    """
+
+    def __init__(self, max_distance=4, min_correlation=0.98):
+        self.max_distance = max_distance
+        self.min_correlation = min_correlation
+        self._hashes = np.empty(64, dtype=np.uint64)
+        self._sizes = []
+        self._profiles = []
+        self._values = []
+
+    def add(self, sig, value):
+        """Запомнить подпись страницы (см. signature) и связанное с ней значение"""
+        phash, size, profile = sig
+        n = len(self._values)
+        if n == len(self._hashes):
+            # Массив растет удвоением, а не копированием при каждом добавлении
+            self._hashes = np.concatenate((self._hashes, np.empty(n, dtype=np.uint64)))
+        self._hashes[n] = phash
+        self._sizes.append(size)
+        self._profiles.append(profile)
+        self._values.append(value)
+
+    def find(self, sig):
+        """(значение, отличие хэшей в битах) ближайшей подходящей страницы или None"""
+        phash, size, profile = sig
+        n = len(self._values)
+        if n == 0:
+            return None
+        distances = popcount(self._hashes[:n] ^ np.uint64(phash))
+        for i in np.argsort(distances, kind='stable'):
+            if distances[i] > self.max_distance:
+                break
+            if self._sizes[i] != size or len(self._profiles[i]) != len(profile):
+                continue
+            if float(np.dot(self._profiles[i], profile)) >= self.min_correlation:
+                return self._values[i], int(distances[i])
+        return None
+
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,73 @@
+import queue
+import threading
+import time
+
+
+_END = object()
+
+
+def prefetch_iter(iterable, depth=2):
+    """Перебор последовательного источника в фоновом потоке с опережением.
+
+    Для источников, которые читаются только по порядку (страницы
+    многостраничного TIFF): генератор выполняется в одном фоновом потоке,
+    готовые элементы ждут в очереди размером depth. Когда очередь полна,
+    поток останавливается, поэтому в памяти не больше depth + 1 элементов.
+    Pillow отпускает GIL при декодировании, так что чтение действительно
+    идет параллельно с расчетом.
+
+    Выдает (элемент, wait_s) в исходном порядке; исключение генератора
+    передается вызывающему коду. При depth=0 перебор идет без потока.
+    """
+    if depth < 0:
+        raise ValueError("Глубина опережения должна быть неотрицательной.")
+    if depth == 0:
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item, time.perf_counter() - start
+
+    ready = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry):
+        # Ожидание места в очереди с проверкой, не прекращен ли перебор
+        while not stop.is_set():
+            try:
+                ready.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as e:
+            put((_END, e))
+        finally:
+            # Генератор закрывается в своем потоке (освобождает открытые файлы)
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=producer, name='prefetch_iter', daemon=True)
+    thread.start()
+    try:
+        while True:
+            start = time.perf_counter()
+            item, error = ready.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item, time.perf_counter() - start
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+
+import mu1_engine
+
+
+def row_order(height, step):
+    """Порядок строк для постепенного уточнения: 0::step, step/2::step, ...
+
+    Каждая следующая порция строк равномерно заполняет промежутки между
+    уже обработанными, поэтому оценка на любом этапе - почти равномерная выборка.
+    """
+    offsets = []
+    stride = step
+    while stride >= 1:
+        for off in range(0, step, stride):
+            if off not in offsets:
+                offsets.append(off)
+        stride //= 2
+    return [np.arange(off, height, step) for off in offsets]
+
+
+class ProgressiveMu1:
+    """Быстрая оценка μ1 по части строк с постепенным уточнением до точного значения.
+
+    μ1 в каждой позиции - сумма по строкам разностей "правая половина минус
+    левая". По n обработанным строкам из H оценка равна H * среднее, а
+    стандартная ошибка - H * std / sqrt(n) * sqrt(1 - n / H) (выборка без
+    возвращения). Когда обработаны все строки, оценка точная и ошибка равна 0.
+    """
+
+    def __init__(self, img_array, w, d, step=16):
+        mu1_engine.validate_params(w, d)
+        self.img_array = img_array
+        self.height, width = img_array.shape
+        self.w = w
+        self.left = mu1_engine.window_positions(width, w, d)
+        self.x = self.left + w / 2
+        self.step = max(1, min(step, self.height))
+        self._chunks = row_order(self.height, self.step)
+        self._sum = np.zeros(len(self.left), dtype=np.float64)
+        self._sum_sq = np.zeros(len(self.left), dtype=np.float64)
+        self._exact = np.zeros(len(self.left), dtype=np.int64)
+        self.rows_done = 0
+
+    def _row_diffs(self, rows):
+        """Разности половин окна для каждой выбранной строки, матрица n x N"""
+        block = self.img_array[rows]
+        prefix = np.zeros((len(rows), block.shape[1] + 1), dtype=np.int64)
+        np.cumsum(block, axis=1, dtype=np.int64, out=prefix[:, 1:])
+        half = self.w // 2
+        left = self.left
+        return ((prefix[:, left + self.w] - prefix[:, left + half])
+                - (prefix[:, left + half] - prefix[:, left]))
+
+    def estimate(self):
+        """Текущая оценка (x, y, err)"""
+        n = self.rows_done
+        if n == 0:
+            raise ValueError("Не обработано ни одной строки.")
+        if n == self.height:
+            return self.x, self._exact.copy(), np.zeros(len(self.x))
+        mean = self._sum / n
+        var = np.maximum(self._sum_sq / n - mean ** 2, 0) * n / max(n - 1, 1)
+        err = self.height * np.sqrt(var / n * (1 - n / self.height))
+        return self.x, self.height * mean, err
+
+    def refine(self):
+        """Генератор этапов уточнения: (x, y, err, доля обработанных строк)"""
+        for rows in self._chunks:
+            if len(rows) == 0:
+                continue
+            diffs = self._row_diffs(rows)
+            self._exact += diffs.sum(axis=0)
+            diffs = diffs.astype(np.float64)
+            self._sum += diffs.sum(axis=0)
+            self._sum_sq += (diffs ** 2).sum(axis=0)
+            self.rows_done += len(rows)
+            x, y, err = self.estimate()
+            yield x, y, err, self.rows_done / self.height
+
+
+def preview_profile(img_array, w, d, step=16):
+    """Первая оценка по каждой step-й строке: (x, y, err)"""
+    progressive = ProgressiveMu1(img_array, w, d, step)
+    x, y, err, _ = next(progressive.refine())
+    return x, y, err
+
+
+def refine_in_background(img_array, w, d, callback, step=16):
+    """Уточнение в фоновом потоке; callback(x, y, err, fraction) на каждом этапе.
+
+    Возвращает (thread, stop_event); stop_event.set() прерывает уточнение.
+    Вызов callback происходит из фонового потока - GUI должен передать
+    данные в свой поток сам (например, через очередь).
+    """
+    stop = threading.Event()
+
+    def worker():
+        for x, y, err, fraction in ProgressiveMu1(img_array, w, d, step).refine():
+            if stop.is_set():
+                return
+            callback(x, y, err, fraction)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread, stop
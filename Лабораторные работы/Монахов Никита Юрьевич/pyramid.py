@@ -0,0 +1,139 @@
+import numpy as np
+
+import mu1_engine
+
+
+def coarse_profile(img_array, factor, row_step=1):
+    """Грубый уровень пирамиды: строки через row_step, столбцы сложены по factor.
+
+    Значения приведены к масштабу полного изображения (умножены на шаг по строкам),
+    чтобы порог find_boundaries на грубом уровне был сопоставим с точным.
+    """
+    height, width = img_array.shape
+    rows = img_array[::row_step]
+    n = width // factor
+    # Суммы столбцов в узком накопителе, как на точном уровне
+    sums = mu1_engine.column_sums(rows[:, :n * factor]).astype(np.int64)
+    return sums.reshape(n, factor).sum(axis=1) * (height / len(rows))
+
+
+def _candidate_ranges(coarse, w_coarse, factor, w, radius, threshold, relax):
+    """Диапазоны левых краев окон полного разрешения вокруг грубых экстремумов"""
+    prefix = np.concatenate(([0.0], np.cumsum(coarse)))
+    left = np.arange(0, len(coarse) - w_coarse + 1)
+    half = w_coarse // 2
+    y = (prefix[left + w_coarse] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+    if len(y) < 3:
+        return None
+
+    # Граница полного разрешения проходит порог max * threshold, поэтому
+    # кандидаты - все участки грубого профиля выше ослабленного порога
+    # (соседние экстремумы на грубом уровне могут слиться в один).
+    candidates = (y > y.max() * threshold * relax) | (y < y.min() * threshold * relax)
+    # Края профиля проверяются всегда: там экстремум может потеряться
+    # из-за отбрасывания неполного блока столбцов
+    candidates[[0, -1]] = True
+    idx = np.flatnonzero(candidates)
+
+    # Центр грубого окна -> левый край точного окна
+    centers = (left[idx] + w_coarse / 2) * factor
+    starts = np.floor(centers - w / 2 - radius).astype(np.int64)
+    stops = np.ceil(centers - w / 2 + radius).astype(np.int64) + 1
+    return starts, stops
+
+
+def _merge(starts, stops, limit):
+    """Объединение пересекающихся диапазонов [start, stop)"""
+    starts = np.clip(starts, 0, limit)
+    stops = np.clip(stops, 0, limit)
+    order = np.argsort(starts)
+    merged = []
+    for a, b in zip(starts[order], stops[order]):
+        if b <= a:
+            continue
+        if merged and a <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], b)
+        else:
+            merged.append([a, b])
+    return merged
+
+
+def coarse_to_fine(img_array, w, levels=2, tolerance=2, threshold=0.3, relax=0.3, row_step=2):
+    """Поиск границ символов от грубого уровня пирамиды к точному.
+
+    1. На уровне, уменьшенном в 2**levels раз по x (и в row_step раз по y),
+       считается μ1 с окном w / 2**levels и находятся кандидаты - участки
+       выше ослабленного порога threshold * relax.
+    2. Вокруг каждого кандидата μ1 пересчитывается в полном разрешении
+       с шагом d=1 только в окрестности радиуса 2**levels + tolerance.
+    3. Границы ищутся по правилу find_boundaries; порог берется от
+       максимума (минимума) по уточненным участкам - глобальный экстремум
+       профиля сам является кандидатом и попадает в них.
+
+    Возвращает словарь: peaks/valleys - координаты x центров окон,
+    segments - уточненные участки (x, y), refined_fraction - доля позиций
+    полного разрешения, которые пришлось вычислить.
+
+    Функция библиотечная: полного профиля μ1 (таблицы, графика) она не
+    строит, поэтому в программу как режим не подключена. Совпадение границ
+    с полным проходом проверяет benchmarks/run_benchmarks.py. Выигрыш
+    есть только на разреженном тексте (заголовки, широкие поля).
+    """
+    mu1_engine.validate_params(w, 1)
+    height, width = img_array.shape
+    if w > width:
+        raise ValueError(f"w={w} больше ширины изображения ({width}).")
+    factor = 2 ** levels
+    w_coarse = w // factor
+    if w_coarse < 2 or w_coarse % 2:
+        raise ValueError(f"Слишком много уровней пирамиды для w={w}: окно грубого уровня {w_coarse}.")
+
+    n_positions = width - w + 1
+    radius = factor + tolerance
+    found = _candidate_ranges(coarse_profile(img_array, factor, row_step), w_coarse, factor, w,
+                              radius, threshold, relax)
+    if found is None:
+        return {'peaks': np.empty(0), 'valleys': np.empty(0), 'segments': [], 'refined_fraction': 0.0}
+
+    # Расширяем на одну позицию с каждой стороны: экстремуму нужны оба соседа
+    ranges = _merge(found[0] - 1, found[1] + 1, n_positions)
+
+    half = w // 2
+    segments = []
+    for start, stop in ranges:
+        cols = mu1_engine.column_sums(img_array[:, start:stop - 1 + w])
+        prefix = mu1_engine.prefix_sums(cols)
+        left = np.arange(stop - start)
+        y = (prefix[left + w] - prefix[left + half]) - (prefix[left + half] - prefix[left])
+        segments.append((start + left + w / 2, y))
+
+    y_max = max(seg[1].max() for seg in segments)
+    y_min = min(seg[1].min() for seg in segments)
+    peaks, valleys = [], []
+    for x, y in segments:
+        if len(y) < 3:
+            continue
+        mid, prev, nxt = y[1:-1], y[:-2], y[2:]
+        peaks.append(x[1:-1][(mid > prev) & (mid > nxt) & (mid > y_max * threshold)])
+        valleys.append(x[1:-1][(mid < prev) & (mid < nxt) & (mid < y_min * threshold)])
+
+    refined = sum(len(seg[1]) for seg in segments)
+    return {
+        'peaks': np.concatenate(peaks) if peaks else np.empty(0),
+        'valleys': np.concatenate(valleys) if valleys else np.empty(0),
+        'segments': segments,
+        'refined_fraction': refined / n_positions,
+    }
+
+
+def match_boundaries(found, reference, tolerance):
+    """Доля границ reference, для которых в found есть граница не дальше tolerance"""
+    reference = np.asarray(reference, dtype=np.float64)
+    found = np.sort(np.asarray(found, dtype=np.float64))
+    if len(reference) == 0:
+        return 1.0
+    if len(found) == 0:
+        return 0.0
+    pos = np.clip(np.searchsorted(found, reference), 1, len(found) - 1)
+    nearest = np.minimum(np.abs(found[pos - 1] - reference), np.abs(found[pos] - reference))
+    return float(np.mean(nearest <= tolerance))
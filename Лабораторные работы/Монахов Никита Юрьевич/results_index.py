@@ -0,0 +1,311 @@
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+import mu1_engine
+import mu1_result
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id         INTEGER PRIMARY KEY,
+    source     TEXT    NOT NULL,
+    image      TEXT    NOT NULL,
+    page       INTEGER NOT NULL DEFAULT 0,
+    pages      INTEGER NOT NULL DEFAULT 1,
+    options    TEXT    NOT NULL DEFAULT '',
+    width      INTEGER,
+    height     INTEGER,
+    w          INTEGER NOT NULL,
+    d          INTEGER NOT NULL,
+    threshold  REAL    NOT NULL,
+    points     INTEGER NOT NULL,
+    boundaries INTEGER NOT NULL,
+    valleys    INTEGER NOT NULL,
+    y_min      INTEGER,
+    y_max      INTEGER,
+    y_dtype    TEXT    NOT NULL,
+    y_blob     BLOB    NOT NULL,
+    peaks_blob BLOB    NOT NULL,
+    valleys_blob BLOB  NOT NULL,
+    created    REAL    NOT NULL,
+    UNIQUE (source, page, options, w, d)
+);
+CREATE INDEX IF NOT EXISTS results_image ON results (image, page);
+CREATE INDEX IF NOT EXISTS results_params ON results (w, d, boundaries);
+CREATE INDEX IF NOT EXISTS results_boundaries ON results (boundaries);
+CREATE TABLE IF NOT EXISTS signatures (
+    source     TEXT    NOT NULL,
+    page       INTEGER NOT NULL,
+    pages      INTEGER NOT NULL,
+    width      INTEGER NOT NULL,
+    height     INTEGER NOT NULL,
+    phash      INTEGER NOT NULL,
+    file_width INTEGER NOT NULL,
+    file_height INTEGER NOT NULL,
+    profile    BLOB    NOT NULL,
+    PRIMARY KEY (source, page)
+);
+"""
+
+# Поля строки без профилей (их возвращает find)
+COLUMNS = ('id', 'source', 'image', 'page', 'pages', 'options', 'width', 'height', 'w', 'd',
+           'threshold', 'points', 'boundaries', 'valleys', 'y_min', 'y_max', 'created')
+
+# Имя CSV-файла программы: данные_<имя>_w<w>_d<d>.csv
+CSV_NAME = re.compile(r'^данные_(?P<name>.+)_w(?P<w>\d+)_d(?P<d>\d+)\.csv$')
+
+
+def pack_profile(y, peaks, valleys):
+    """y в самом узком целом типе и маски границ по 8 в байт"""
+    y = np.asarray(y)
+    bound = int(np.abs(y).max()) if len(y) else 0
+    dtype = mu1_engine.accumulator_dtype(bound)
+    return (dtype.str, y.astype(dtype).tobytes(),
+            np.packbits(np.asarray(peaks, dtype=bool)).tobytes(),
+            np.packbits(np.asarray(valleys, dtype=bool)).tobytes())
+
+
+def unpack_profile(points, y_dtype, y_blob, peaks_blob, valleys_blob):
+    """(y int64, peaks, valleys) из BLOB-полей"""
+    y = np.frombuffer(y_blob, dtype=np.dtype(y_dtype)).astype(np.int64)
+    peaks = np.unpackbits(np.frombuffer(peaks_blob, dtype=np.uint8), count=points).astype(bool)
+    valleys = np.unpackbits(np.frombuffer(valleys_blob, dtype=np.uint8), count=points).astype(bool)
+    return y, peaks, valleys
+
+
+def pack_signature(sig):
+    """Подпись perceptual_hash.signature в поля таблицы signatures"""
+    phash, size, profile = sig
+    # INTEGER в SQLite знаковый: хэш хранится как int64 с теми же битами
+    return (int(np.uint64(phash).view(np.int64)), *size,
+            np.asarray(profile, dtype=np.float32).tobytes())
+
+
+def unpack_signature(phash, file_width, file_height, profile):
+    """Подпись (хэш uint64, размер файла, профиль) из полей таблицы signatures"""
+    return (int(np.int64(phash).view(np.uint64)), (file_width, file_height),
+            np.frombuffer(profile, dtype=np.float32))
+
+
+class ResultsIndex:
+    """Хранилище результатов μ1 в SQLite для запросов по многим документам.
+
+    Одна строка - одно изображение (страница) с параметрами w, d: сводные
+    числа (число границ, минимумов, диапазон y) и профиль в BLOB-полях
+    (y в самом узком целом типе, маски границ упакованы по 8 в байт;
+    x не хранится - это w/2 + i*d). База в режиме WAL: чтение не ждет
+    записи. Строки копятся в памяти и вставляются пачками по batch_size
+    одним executemany в одной транзакции.
+
+    Документ определяется полным путем к файлу (source), поэтому
+    одноименные сканы из разных папок хранятся отдельно; имя файла (image) -
+    отдельный индексированный столбец для запросов. Повторная обработка
+    того же файла с теми же параметрами заменяет строку.
+
+    В таблице signatures хранятся подписи обработанных страниц
+    (perceptual_hash.signature), чтобы повторы находились и в следующих
+    запусках.
+    """
+
+    def __init__(self, path, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._signatures = []
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+
+    def _migrate(self):
+        """Перенос базы старого формата (строки различались только именем файла)"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(results)")}
+        if not columns or 'source' in columns:
+            return
+        # Путь к файлу в старой базе не записан - вместо него остается имя
+        copied = ', '.join(c for c in COLUMNS if c not in ('id', 'source'))
+        copied += ', y_dtype, y_blob, peaks_blob, valleys_blob'
+        with self.conn:
+            for name in ('results_image', 'results_params', 'results_boundaries'):
+                self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+            self.conn.execute("ALTER TABLE results RENAME TO results_old")
+            self.conn.execute(SCHEMA.split(';')[0])
+            self.conn.execute(f"INSERT INTO results (source, {copied}) SELECT image, {copied} FROM results_old")
+            self.conn.execute("DROP TABLE results_old")
+
+    def add(self, result, options='', source=None):
+        """Добавление Mu1Result (запись на диск - при накоплении пачки или flush).
+
+        source - путь к исходному файлу; без него документ определяется
+        только именем файла.
+        """
+        source = os.path.realpath(source) if source is not None else result.filename
+        y_min, y_max = (int(result.y.min()), int(result.y.max())) if len(result) else (None, None)
+        self._pending.append((
+            source, result.filename, result.page, result.pages, options, result.width, result.height,
+            result.w, result.d, result.threshold, len(result),
+            int(result.peaks.sum()), int(result.valleys.sum()), y_min, y_max,
+            *pack_profile(result.y, result.peaks, result.valleys), time.time()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, results, options=''):
+        for result in results:
+            self.add(result, options)
+        self.flush()
+
+    def add_signature(self, source, page, pages, width, height, sig):
+        """Подпись обработанной страницы (width, height - размер массива после чтения)"""
+        self._signatures.append((os.path.realpath(source), page, pages, width, height, *pack_signature(sig)))
+        if len(self._signatures) >= self.batch_size:
+            self.flush()
+
+    def signatures(self):
+        """Все сохраненные подписи: (source, page, pages, width, height, подпись)"""
+        self.flush()
+        for row in self.conn.execute("SELECT source, page, pages, width, height, phash, "
+                                     "file_width, file_height, profile FROM signatures"):
+            yield (*row[:5], unpack_signature(*row[5:]))
+
+    def latest(self, source, page, options, w=None, d=None):
+        """Последний результат страницы файла source с настройками options (Mu1Result или None)"""
+        self.flush()
+        sql = "SELECT id FROM results WHERE source = ? AND page = ? AND options = ?"
+        params = [os.path.realpath(source), page, options]
+        for column, value in (('w', w), ('d', d)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        row = self.conn.execute(sql + " ORDER BY created DESC LIMIT 1", params).fetchone()
+        return self.load(row[0]) if row else None
+
+    def flush(self):
+        """Вставка накопленных строк одной транзакцией"""
+        if not self._pending and not self._signatures:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO signatures (source, page, pages, width, height, phash, "
+                "file_width, file_height, profile) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._signatures)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (source, image, page, pages, options, width, height, "
+                "w, d, threshold, points, boundaries, valleys, y_min, y_max, y_dtype, y_blob, "
+                "peaks_blob, valleys_blob, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending)
+        self._pending.clear()
+        self._signatures.clear()
+
+    def find(self, w=None, d=None, min_boundaries=None, max_boundaries=None, image=None,
+             options=None, limit=None):
+        """Сводные строки (словари без профилей), подходящие под условия.
+
+        image - имя файла или шаблон LIKE (например, 'скан_%').
+        """
+        self.flush()
+        conditions, params = [], []
+        for column, op, value in (('w', '=', w), ('d', '=', d), ('boundaries', '>=', min_boundaries),
+                                  ('boundaries', '<=', max_boundaries), ('options', '=', options)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        if image is not None:
+            conditions.append("image LIKE ?")
+            params.append(image)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM results"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY image, source, page, w, d"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [dict(zip(COLUMNS, row)) for row in self.conn.execute(sql, params)]
+
+    def load(self, row_id):
+        """Mu1Result по id строки (с восстановленными x, y и масками)"""
+        self.flush()
+        row = self.conn.execute(
+            "SELECT image, page, pages, width, height, w, d, threshold, points, "
+            "y_dtype, y_blob, peaks_blob, valleys_blob FROM results WHERE id = ?", (row_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Нет результата с id={row_id}")
+        image, page, pages, width, height, w, d, threshold, points = row[:9]
+        y, peaks, valleys = unpack_profile(points, *row[9:])
+        name = os.path.splitext(image)[0]
+        # Ширина может быть неизвестна (импорт из CSV) - число окон берется из базы
+        result = mu1_result.Mu1Result(name, image, width, height, w, d, page, pages, threshold,
+                                      points=points)
+        return result.fill(w / 2 + d * np.arange(points), y, peaks, valleys)
+
+    def import_csv(self, path):
+        """Импорт ранее сохраненного файла данные_<имя>_w<w>_d<d>.csv"""
+        match = CSV_NAME.match(os.path.basename(path))
+        if match is None:
+            raise ValueError(f"Имя файла не похоже на данные_<имя>_w<w>_d<d>.csv: {path}")
+        w, d = int(match['w']), int(match['d'])
+        with open(path, encoding='utf-8') as f:
+            rows = list(csv.reader(f))[1:]
+        y = np.array([float(row[2]) for row in rows], dtype=np.int64)
+        peaks = np.array([row[3] == '1' for row in rows], dtype=bool)
+        valleys = np.array([row[4] == '1' for row in rows], dtype=bool)
+        points = len(rows)
+        # Размер изображения в CSV не записан
+        result = mu1_result.Mu1Result(match['name'], match['name'], None, None, w, d, points=points)
+        result.fill(w / 2 + d * np.arange(points), y, peaks, valleys)
+        self.add(result, options='csv', source=path)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запросы к базе результатов μ1")
+    parser.add_argument('database', help="файл базы SQLite")
+    parser.add_argument('--import', dest='import_files', nargs='+', metavar='CSV',
+                        help="импортировать файлы данные_*.csv")
+    parser.add_argument('-w', type=int)
+    parser.add_argument('-d', type=int)
+    parser.add_argument('--min-boundaries', type=int, metavar='N')
+    parser.add_argument('--max-boundaries', type=int, metavar='N')
+    parser.add_argument('--image', help="имя файла или шаблон LIKE ('скан_%%')")
+    parser.add_argument('--limit', type=int)
+    args = parser.parse_args()
+
+    with ResultsIndex(args.database) as index:
+        if args.import_files:
+            for path in args.import_files:
+                try:
+                    index.import_csv(path)
+                except (OSError, ValueError, IndexError) as e:
+                    print(f"Пропуск {path}: {e}")
+            index.flush()
+            print(f"Импортировано файлов: {len(args.import_files)}")
+
+        start = time.perf_counter()
+        rows = index.find(w=args.w, d=args.d, min_boundaries=args.min_boundaries,
+                          max_boundaries=args.max_boundaries, image=args.image, limit=args.limit)
+        elapsed = time.perf_counter() - start
+        print(f"{'id':>6} {'Изображение':<30} {'Стр.':>5} {'w':>4} {'d':>4} {'Точек':>7} {'Границ':>7}  "
+              f"{'Настройки':<12} Файл")
+        for row in rows:
+            print(f"{row['id']:6d} {row['image']:<30} {row['page'] + 1:5d} {row['w']:4d} {row['d']:4d} "
+                  f"{row['points']:7d} {row['boundaries']:7d}  {row['options']:<12} {row['source']}")
+        print(f"Найдено: {len(rows)} за {elapsed * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
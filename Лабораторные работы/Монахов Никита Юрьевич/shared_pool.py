@@ -0,0 +1,168 @@
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import kernels
+import mu1_engine
+
+
+class SharedBlock:
+    """Блок разделяемой памяти под массив NumPy.
+
+    Создается только в родительском процессе, который и удаляет его (unlink).
+    Рабочие процессы подключаются к блоку по имени (attach) и видят те же
+    данные без копирования и сериализации.
+    """
+
+    def __init__(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.dtype = dtype.str
+        size = max(1, int(np.prod(self.shape)) * dtype.itemsize)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.name = self._shm.name
+        # Страховка: блок удаляется, даже если release() так и не был вызван
+        self._finalizer = weakref.finalize(self, _unlink, self._shm)
+
+    @property
+    def alive(self):
+        return self._finalizer.alive
+
+    @property
+    def array(self):
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    @property
+    def spec(self):
+        """Описание блока для передачи в рабочий процесс: (имя, форма, тип)"""
+        return self.name, self.shape, self.dtype
+
+    def release(self):
+        """Закрытие и удаление блока (повторный вызов ничего не делает)"""
+        self._finalizer()
+
+
+def _unlink(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # Остались представления NumPy - сам блок все равно удаляем
+        pass
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _mu1_worker(image_spec, y_spec, marks_spec, w, d, threshold, backend_name):
+    """Расчет в рабочем процессе: читает изображение и пишет результаты в общие блоки"""
+    blocks = [shared_memory.SharedMemory(name=spec[0]) for spec in (image_spec, y_spec, marks_spec)]
+    try:
+        image, y_out, marks = (np.ndarray(spec[1], dtype=spec[2], buffer=shm.buf)
+                               for spec, shm in zip((image_spec, y_spec, marks_spec), blocks))
+        # Параллельность уже по процессам - полосы в потоках не нужны
+        backend = kernels.get_backend(backend_name, workers=1)
+        _, y = backend.mu1(image, w, d)
+        peaks, valleys = backend.extrema(y, threshold)
+        y_out[:] = y
+        # Границы в одном массиве: 1 - пик, -1 - впадина, 0 - нет границы
+        marks[:] = peaks.astype(np.int8) - valleys.astype(np.int8)
+        del image, y_out, marks
+    finally:
+        # Рабочий процесс только отключается от блоков, удаляет их родитель
+        for shm in blocks:
+            shm.close()
+
+
+class SharedJob:
+    """Задание пула: результат (x, y, peaks, valleys) через result()"""
+
+    def __init__(self, future, x, threshold, blocks):
+        self._future = future
+        self.x = x
+        self.threshold = threshold
+        self._blocks = blocks
+
+    def result(self):
+        """Ожидание результата; блоки памяти освобождаются в любом случае"""
+        try:
+            self._future.result()
+            _, y_block, marks_block = self._blocks
+            y = y_block.array.copy()
+            marks = marks_block.array.copy()
+            return self.x, y, marks > 0, marks < 0
+        finally:
+            self.release()
+
+    @property
+    def released(self):
+        return not any(block.alive for block in self._blocks)
+
+    def release(self):
+        for block in self._blocks:
+            block.release()
+
+
+class SharedMu1Pool:
+    """Пул процессов для расчета μ1 с передачей массивов через разделяемую память.
+
+    Изображение копируется в общий блок один раз в родительском процессе;
+    рабочий процесс получает только имя блока, форму и тип, подключается
+    к нему без копирования и записывает y и границы в заранее выделенные
+    общие блоки результатов. Все блоки создает и удаляет родитель: после
+    result(), при ошибке или аварийном завершении рабочего процесса
+    (BrokenProcessPool) и при закрытии пула.
+    """
+
+    def __init__(self, processes=None, threshold=0.3, backend=None):
+        self.threshold = threshold
+        self.backend_name = kernels.get_backend(backend).name
+        # spawn: в родителе могут работать потоки предзагрузки, fork с ними небезопасен
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._jobs = []
+
+    def submit(self, img_array, w, d):
+        """Постановка изображения в очередь, возвращает SharedJob"""
+        mu1_engine.validate_params(w, d)
+        left = mu1_engine.window_positions(img_array.shape[1], w, d)
+        blocks = []
+        try:
+            image_block = SharedBlock(img_array.shape, img_array.dtype)
+            blocks.append(image_block)
+            image_block.array[...] = img_array
+            blocks.append(SharedBlock((len(left),), np.int64))
+            blocks.append(SharedBlock((len(left),), np.int8))
+            future = self._executor.submit(_mu1_worker, *(b.spec for b in blocks),
+                                           w, d, self.threshold, self.backend_name)
+        except BaseException:
+            for block in blocks:
+                block.release()
+            raise
+        job = SharedJob(future, left + w / 2, self.threshold, blocks)
+        self._jobs = [j for j in self._jobs if not j.released]
+        self._jobs.append(job)
+        return job
+
+    def map(self, arrays, w, d):
+        """Расчет для нескольких изображений, результаты в исходном порядке"""
+        jobs = [self.submit(arr, w, d) for arr in arrays]
+        return [job.result() for job in jobs]
+
+    def close(self):
+        """Остановка процессов и удаление всех оставшихся блоков"""
+        try:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            for job in self._jobs:
+                job.release()
+            self._jobs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
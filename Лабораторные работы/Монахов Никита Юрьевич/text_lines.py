@@ -0,0 +1,95 @@
+import numpy as np
+
+import integral_image
+import mu1_engine
+
+
+def find_text_lines(img_array, level=0.15, min_height=4, min_gap=2, sat=None):
+    """Поиск полос текстовых строк по горизонтальной проекции яркости.
+
+    Строка изображения считается текстовой, если ее "темнота" (недостача
+    яркости до белого) превышает уровень level между минимальной и
+    максимальной темнотой по странице. Полосы, разделенные промежутком
+    короче min_gap строк, объединяются; полосы ниже min_height отбрасываются.
+
+    Возвращает массив Bx2 с границами полос [top, bottom).
+    """
+    height, width = img_array.shape
+    if sat is not None:
+        # Суммы строк - последний столбец интегрального изображения
+        row_sums = np.diff(sat[:, -1])
+    else:
+        row_sums = img_array.sum(axis=1, dtype=np.int64)
+    darkness = 255 * width - row_sums
+
+    lo, hi = darkness.min(), darkness.max()
+    if hi == lo:
+        return np.empty((0, 2), dtype=np.int64)
+    is_text = darkness > lo + level * (hi - lo)
+
+    # Начала и концы непрерывных участков текстовых строк
+    edges = np.diff(np.concatenate(([0], is_text.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Объединение полос с короткими промежутками
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    group = np.cumsum(keep) - 1
+    tops = starts[keep]
+    bottoms = np.zeros(len(tops), dtype=np.int64)
+    np.maximum.at(bottoms, group, ends)
+
+    bands = np.stack([tops, bottoms], axis=1)
+    return bands[bands[:, 1] - bands[:, 0] >= min_height]
+
+
+def line_profiles(img_array, w, d, bands=None, threshold=0.3, **line_options):
+    """μ1 и границы символов для каждой текстовой строки за один проход.
+
+    Все полосы обрабатываются одновременно по общему интегральному
+    изображению: сумма окна в полосе - четыре обращения к таблице, поэтому
+    μ1 всех строк получается одной матрицей BxN без вырезания полос.
+
+    Возвращает список словарей (по одному на строку) с ключами
+    top, bottom, x, y, peaks, valleys; peaks и valleys - индексы в x/y,
+    их число у строк разное.
+    """
+    mu1_engine.validate_params(w, d)
+    sat = integral_image.integral_image(img_array)
+    if bands is None:
+        bands = find_text_lines(img_array, sat=sat, **line_options)
+    bands = np.asarray(bands, dtype=np.int64).reshape(-1, 2)
+    if len(bands) == 0:
+        return []
+
+    width = img_array.shape[1]
+    lefts = mu1_engine.window_positions(width, w, d)[None, :]
+    tops = bands[:, 0:1]
+    heights = bands[:, 1:2] - tops
+    half = w // 2
+
+    y = (integral_image.block_sums(sat, tops, lefts + half, heights, half)
+         - integral_image.block_sums(sat, tops, lefts, heights, half))
+    x = lefts[0] + w / 2
+
+    peaks, valleys = mu1_engine.find_extrema(y, threshold)
+    peak_rows, peak_cols = np.nonzero(peaks)
+    valley_rows, valley_cols = np.nonzero(valleys)
+    peak_split = np.cumsum(np.bincount(peak_rows, minlength=len(bands)))[:-1]
+    valley_split = np.cumsum(np.bincount(valley_rows, minlength=len(bands)))[:-1]
+
+    lines = []
+    for (top, bottom), y_line, p, v in zip(bands, y,
+                                           np.split(peak_cols, peak_split),
+                                           np.split(valley_cols, valley_split)):
+        lines.append({
+            'top': int(top),
+            'bottom': int(bottom),
+            'x': x,
+            'y': y_line,
+            'peaks': p,
+            'valleys': v,
+        })
+    return lines
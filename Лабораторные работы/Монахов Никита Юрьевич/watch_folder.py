@@ -0,0 +1,128 @@
+import os
+import time
+
+import image_io
+
+
+class FileIndex:
+    """Инкрементальный индекс изображений в папке для режима наблюдения.
+
+    Для каждого файла хранится подпись (размер, mtime). Папка целиком
+    перечитывается через os.scandir только при изменении ее mtime (файл
+    добавлен, удален или переименован) и раз в rescan_interval секунд
+    (на случай перезаписи файла на месте). В остальных опросах
+    проверяются только файлы, ожидающие стабилизации.
+
+    Файл считается готовым, когда его подпись не изменилась между двумя
+    опросами и с последнего изменения прошло не меньше settle секунд -
+    так пропускаются файлы, которые еще дописываются.
+
+    Файл, обработка которого не удалась (mark_failed), снова выдается
+    через retry_delay, 2*retry_delay, 4*retry_delay... секунд, но не больше
+    max_retries раз; после этого он пропускается до изменения подписи.
+    """
+
+    def __init__(self, directory, settle=2.0, rescan_interval=60.0, ignore_prefixes=(),
+                 retry_delay=10.0, max_retries=3):
+        self.directory = directory
+        self.settle = settle
+        self.rescan_interval = rescan_interval
+        self.ignore_prefixes = tuple(ignore_prefixes)
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.known = {}       # имя -> подпись уже обработанной версии
+        self.pending = {}     # имя -> подпись при последнем опросе
+        self.failures = {}    # имя -> (подпись, число неудач, время следующей попытки)
+        self._dir_mtime = None
+        self._last_full = None
+        self.full_scans = 0
+
+    def _wanted(self, name):
+        return (name.lower().endswith(image_io.IMAGE_EXTENSIONS)
+                and not name.startswith(self.ignore_prefixes))
+
+    def _scan(self):
+        """Полный проход по папке: подписи всех изображений"""
+        current = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if self._wanted(entry.name) and entry.is_file():
+                    st = entry.stat()
+                    current[entry.name] = (st.st_size, st.st_mtime_ns)
+        self.full_scans += 1
+        return current
+
+    def _stat_pending(self):
+        """Подписи только ожидающих файлов"""
+        current = {}
+        for name in self.pending:
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            current[name] = (st.st_size, st.st_mtime_ns)
+        return current
+
+    def poll(self, now=None):
+        """Опрос папки; возвращает отсортированный список путей готовых файлов"""
+        now = time.time() if now is None else now
+        dir_mtime = os.stat(self.directory).st_mtime_ns
+        full = (dir_mtime != self._dir_mtime or self._last_full is None
+                or now - self._last_full >= self.rescan_interval)
+        if full:
+            current = self._scan()
+            self._dir_mtime = dir_mtime
+            self._last_full = now
+            # Удаленные файлы забываем, чтобы новый файл с тем же именем обработался
+            for name in list(self.known):
+                if name not in current:
+                    del self.known[name]
+            for name in list(self.failures):
+                if name not in current:
+                    del self.failures[name]
+        else:
+            current = self._stat_pending()
+
+        ready = []
+        pending = {}
+        for name, signature in current.items():
+            if self.known.get(name) == signature:
+                continue
+            failure = self.failures.get(name)
+            if failure is not None and failure[0] != signature:
+                # Файл изменился - попытки считаются заново
+                del self.failures[name]
+                failure = None
+            stable = (self.pending.get(name) == signature
+                      and now - signature[1] / 1e9 >= self.settle
+                      and (failure is None or now >= failure[2]))
+            if stable:
+                self.known[name] = signature
+                ready.append(os.path.join(self.directory, name))
+            else:
+                pending[name] = signature
+        self.pending = pending
+        return sorted(ready)
+
+    def mark_failed(self, path, now=None):
+        """Обработка файла не удалась: время следующей попытки или None, если попытки исчерпаны"""
+        now = time.time() if now is None else now
+        name = os.path.basename(path)
+        signature = self.known.pop(name, None)
+        if signature is None:
+            return None
+        count = self.failures.get(name, (None, 0))[1] + 1
+        if count > self.max_retries:
+            # Больше не пробуем, пока файл не изменится
+            self.known[name] = signature
+            self.failures.pop(name, None)
+            return None
+        retry_at = now + self.retry_delay * 2 ** (count - 1)
+        self.failures[name] = (signature, count, retry_at)
+        # Ожидающие файлы проверяются в каждом опросе, даже без полного прохода
+        self.pending[name] = signature
+        return retry_at
+
+    def mark_done(self, path):
+        """Файл обработан: счетчик неудач сбрасывается"""
+        self.failures.pop(os.path.basename(path), None)
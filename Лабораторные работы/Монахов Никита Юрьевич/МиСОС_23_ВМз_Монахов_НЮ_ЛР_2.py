@@ -1,11 +1,33 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import queue
+import shutil
 import sys
-from PIL import Image
+import argparse
+import time
+from collections import deque
+
+from instrumentation import StageProfiler, load_records, summarize, print_summary
+import mu1_engine
+import integral_image
+import text_lines
+import preview
+import kernels
+import prefetch
+import shared_pool
+import image_io
+import watch_folder
+import binary_page
+import mu1_result
+import results_index
+import batch_journal
+import perceptual_hash
+import auto_window
 
 class ImageFilterAnalyzer:
-    def __init__(self):
+    def __init__(self, profile_path=None, backend=None, scale=1, median_radius=0, binarize=False,
+                 threads=None, index_path=None, dedup=False):
         print("=" * 60)
         print("АНАЛИЗ ИЗОБРАЖЕНИЙ - ФИЛЬТР АКТИВНОГО ВОСПРИЯТИЯ")
         print("=" * 60)
@@ -14,36 +36,72 @@ class ImageFilterAnalyzer:
         self.program_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
         print("Директория программы:", self.program_dir)
         
+        # Замеры времени и памяти по этапам (включаются параметром --profile)
+        self.profiler = StageProfiler(profile_path)
+        
+        # Ядра для расчета фильтра и поиска границ (NumPy или Numba);
+        # суммы столбцов большого изображения считаются полосами в threads потоках
+        self.backend = kernels.get_backend(backend, threads)
+        print("Вычислительные ядра:", self.backend.name)
+        
+        # Уменьшение при чтении (1, 2, 4 или 8 раз; для JPEG - средствами декодера)
+        self.scale = scale
+        
+        # Медианный фильтр перед расчетом μ1 (0 - не применять)
+        self.median_radius = median_radius
+        
+        # Бинаризация по Оцу с упаковкой битов (для черно-белых сканов)
+        self.binarize = binarize
+        
+        # Страниц, пропущенных по журналу в последнем пакете
+        self.skipped = 0
+        # Страниц-повторов, результаты которых взяты у оригиналов
+        self.reused = 0
+        # Файлы последнего пакета, которые не удалось прочитать или обработать
+        self.failed_paths = set()
+        
+        # Индекс подписей обработанных страниц: повторы (пересканы) не считаются заново
+        self.duplicates = perceptual_hash.HashIndex() if dedup else None
+        
+        # База результатов SQLite для запросов по многим документам
+        self.index = results_index.ResultsIndex(index_path) if index_path else None
+        if self.index:
+            print("База результатов:", index_path)
+        
+        # Подписи страниц из прошлых запусков хранятся в базе результатов
+        if self.duplicates is not None and self.index:
+            for source, page, pages, width, height, sig in self.index.signatures():
+                self.duplicates.add(sig, {'filename': os.path.basename(source),
+                                          'name': self._result_name(source, page, pages),
+                                          'width': width, 'height': height, 'result': None,
+                                          'path': source, 'page': page, 'stored': True})
+            print("Подписей обработанных страниц в базе:", len(self.duplicates))
+        elif self.duplicates is not None:
+            print("Повторы ищутся только среди страниц этого запуска (подписи сохраняются с --index)")
+        
     def find_images_in_directory(self):
         """Поиск всех изображений в директории программы"""
         images = []
         
-        # Проверяем все файлы в директории программы
-        for file in os.listdir(self.program_dir):
-            file_lower = file.lower()
-            # Проверяем расширения файлов
-            if (file_lower.endswith('.png') or 
-                file_lower.endswith('.jpg') or 
-                file_lower.endswith('.jpeg')):
-                
-                full_path = os.path.join(self.program_dir, file)
-                # Проверяем, что это файл (а не папка)
-                if os.path.isfile(full_path):
-                    # Получаем размер файла
-                    file_size = os.path.getsize(full_path)
+        # Один проход os.scandir: тип и размер файла берутся из записи каталога
+        with os.scandir(self.program_dir) as entries:
+            for entry in entries:
+                # Проверяем расширение и что это файл (а не папка)
+                if entry.name.lower().endswith(image_io.IMAGE_EXTENSIONS) and entry.is_file():
                     images.append({
-                        'name': file,
-                        'path': full_path,
-                        'size_kb': file_size / 1024
+                        'name': entry.name,
+                        'path': entry.path,
+                        'size_kb': entry.stat().st_size / 1024
                     })
         
+        images.sort(key=lambda img: img['name'])
         return images
     
     def display_image_list(self, images):
         """Отображение списка найденных изображений"""
         if not images:
             print("\nВ директории программы не найдено изображений!")
-            print("Доступные форматы: PNG, JPG, JPEG")
+            print("Доступные форматы: PNG, JPG, JPEG, TIFF (в том числе многостраничные)")
             print("\nТекущая директория:", self.program_dir)
             return False
         
@@ -166,51 +224,310 @@ class ImageFilterAnalyzer:
             
             print(f"Размер файла: {file_size / 1024:.1f} КБ")
             
-            # Открываем изображение
-            img = Image.open(path)
+            self.profiler.begin_image(os.path.basename(path))
             
-            # Получаем информацию об изображении
-            print(f"Формат: {img.format}")
-            print(f"Размер: {img.width}x{img.height} пикселей")
-            print(f"Цветовой режим: {img.mode}")
+            # Декодер сразу выдает оттенки серого (для JPEG - и уменьшение),
+            # цветной оригинал в памяти не сохраняется
+            with self.profiler.stage('decode'):
+                img_array, info = image_io.load_grayscale(path, self.scale)
             
-            # Преобразуем в черно-белое
-            if img.mode != 'L':
-                print("Преобразование в черно-белое...")
-                gray_img = img.convert('L')
-            else:
-                gray_img = img
+            # Получаем информацию об изображении
+            print(f"Формат: {info['format']}")
+            print(f"Размер: {info['size'][0]}x{info['size'][1]} пикселей")
+            print(f"Цветовой режим: {info['mode']}")
+            if self.scale > 1:
+                print(f"Уменьшено в {self.scale} раз: {img_array.shape[1]}x{img_array.shape[0]} пикселей")
+            if info['frames'] > 1:
+                print(f"Многостраничный файл: {info['frames']} страниц, загружена первая "
+                      f"(все страницы обрабатываются в пакетном режиме)")
             
-            # Конвертируем в numpy массив
-            img_array = np.array(gray_img)
+            if self.median_radius:
+                size = 2 * self.median_radius + 1
+                print(f"Медианный фильтр {size}x{size}...")
+                with self.profiler.stage('median'):
+                    img_array = self.backend.median(img_array, self.median_radius)
             
             print("Изображение успешно загружено!")
             
-            return {
-                'array': img_array,
-                'original': img,
-                'gray': gray_img,
-                'path': path,
-                'filename': os.path.basename(path),
-                'width': img.width,
-                'height': img.height,
-                'name': os.path.splitext(os.path.basename(path))[0]
-            }
+            image_data = self._image_record(path, img_array, 0, info['frames'])
+            
+            if self.binarize:
+                with self.profiler.stage('binarize'):
+                    page = self._binarize(image_data)
+                print(f"Бинаризация по порогу Оцу: {page.threshold}, "
+                      f"упакованная страница {page.nbytes / 1024:.1f} КБ")
+            
+            return image_data
             
         except Exception as e:
             print(f"Ошибка загрузки изображения: {e}")
             print("Проверьте:")
             print("1. Файл не поврежден")
             print("2. Это действительно изображение")
-            print("3. Формат поддерживается (PNG, JPG, JPEG)")
+            print("3. Формат поддерживается (PNG, JPG, JPEG, TIFF)")
+            return None
+    
+    @staticmethod
+    def _image_record(path, img_array, page=0, pages=1):
+        """Словарь с данными изображения, который передается дальше по этапам
+        
+        Для страниц многостраничного файла к имени результатов добавляется
+        номер страницы: документ_стр001, документ_стр002, ...
+        """
+        return {
+            'array': img_array,
+            'path': path,
+            'filename': os.path.basename(path),
+            'width': img_array.shape[1],
+            'height': img_array.shape[0],
+            'name': ImageFilterAnalyzer._result_name(path, page, pages),
+            'page': page,
+            'pages': pages
+        }
+    
+    @staticmethod
+    def _result_name(path, page=0, pages=1):
+        """Имя для файлов результатов (со страницей для многостраничных файлов)"""
+        name = os.path.splitext(os.path.basename(path))[0]
+        if pages > 1:
+            name = f"{name}_стр{page + 1:0{max(3, len(str(pages)))}d}"
+        return name
+    
+    def _output_paths(self, name, w, d, bank=False, lines=False):
+        """Файлы, которые process_image записывает для изображения"""
+        names = [f"результаты_{name}_w{w}_d{d}.txt", f"данные_{name}_w{w}_d{d}.csv",
+                 f"график_{name}_w{w}_d{d}.png"]
+        if bank:
+            names.append(f"признаки_{name}_w{w}_d{d}.csv")
+        if lines:
+            names.append(f"строки_{name}_w{w}_d{d}.txt")
+        return [os.path.join(self.program_dir, n) for n in names]
+    
+    def _options_label(self):
+        """Настройки предобработки для базы результатов: 'scale=2,median=1,binarize'"""
+        parts = []
+        if self.scale > 1:
+            parts.append(f"scale={self.scale}")
+        if self.median_radius:
+            parts.append(f"median={self.median_radius}")
+        if self.binarize:
+            parts.append("binarize")
+        return ",".join(parts)
+    
+    def _binarize(self, image_data):
+        """Замена массива яркостей бинарной страницей, упакованной по 8 пикселей в байт"""
+        image_data['packed'] = binary_page.PackedPage.from_gray(image_data.pop('array'))
+        return image_data['packed']
+    
+    @staticmethod
+    def _pixels(image_data):
+        """Массив пикселей для этапов, которым он нужен (бинарная страница распаковывается в 0/1)"""
+        if 'packed' in image_data:
+            return image_data['packed'].unpack()
+        return image_data['array']
+    
+    def _iter_pages(self, paths, journal=None, params='', outputs=None):
+        """Страницы всех файлов пакета по порядку: (путь, image_data или None, ошибка)
+        
+        Страницы многостраничного файла декодируются по одной при переборе,
+        поэтому в памяти находится только текущая страница. Время чтения
+        возвращаются в image_data['timings'], начало чтения - в image_data['started']
+        (перебор идет в фоновом потоке).
+        Страницы, завершенные по журналу journal с теми же параметрами,
+        у которых на месте все файлы outputs(имя результатов) (без outputs -
+        записанные в журнале), не декодируются
+        (их число - в self.skipped). При поиске повторов для страницы-повтора
+        выдается запись без пикселей с ключом 'duplicate_of'; JPEG для
+        проверки сначала читается в 8 раз уменьшенным.
+        """
+        for path in paths:
+            try:
+                pages = image_io.frame_count(path)
+                wanted = None
+                if journal is not None:
+                    info = journal.file_info(path)
+                    keys = {page: journal.item_key(info[3], page, params) for page in range(pages)}
+                    wanted = [page for page, key in keys.items()
+                              if not journal.is_done(key, outputs(self._result_name(path, page, pages))
+                                                     if outputs else None)]
+                    self.skipped += pages - len(wanted)
+                    if not wanted:
+                        continue
+                # JPEG проверяется на повтор до полного чтения (подпись - по уменьшенному)
+                early = self.duplicates is not None and path.lower().endswith(('.jpg', '.jpeg'))
+                sig = None
+                timings = {}
+                started = time.perf_counter()
+                if early:
+                    with self.profiler.measure(timings, 'signature'):
+                        sig = perceptual_hash.file_signature(path)
+                    duplicate = self._duplicate_record(path, 0, pages, sig, timings, started)
+                    if duplicate is not None:
+                        if journal is not None:
+                            duplicate['journal'] = (journal, keys[0], info)
+                        yield path, duplicate, None
+                        continue
+                frames = image_io.iter_frames(path, self.scale, wanted)
+                while True:
+                    if not early:
+                        timings = {}
+                        started = time.perf_counter()
+                    with self.profiler.measure(timings, 'decode'):
+                        frame = next(frames, None)
+                    if frame is None:
+                        break
+                    page, img_array = frame
+                    if self.duplicates is not None and not early:
+                        # Без уменьшения при чтении подпись строится по уже прочитанной странице
+                        with self.profiler.measure(timings, 'signature'):
+                            sig = (perceptual_hash.array_signature(img_array) if self.scale == 1
+                                   else perceptual_hash.file_signature(path, page))
+                        duplicate = self._duplicate_record(path, page, pages, sig, timings, started)
+                        if duplicate is not None:
+                            if journal is not None:
+                                duplicate['journal'] = (journal, keys[page], info)
+                            yield path, duplicate, None
+                            continue
+                    if self.median_radius:
+                        with self.profiler.measure(timings, 'median'):
+                            img_array = self.backend.median(img_array, self.median_radius)
+                    image_data = self._image_record(path, img_array, page, pages)
+                    if self.binarize:
+                        with self.profiler.measure(timings, 'binarize'):
+                            self._binarize(image_data)
+                    if sig is not None:
+                        # Оригинал запоминается сразу: следующая страница может оказаться его повтором
+                        image_data['original'] = {'filename': image_data['filename'], 'name': image_data['name'],
+                                                  'width': image_data['width'], 'height': image_data['height'],
+                                                  'result': None}
+                        image_data['sig'] = sig
+                        self.duplicates.add(sig, image_data['original'])
+                    image_data['timings'] = timings
+                    image_data['started'] = started
+                    if journal is not None:
+                        image_data['journal'] = (journal, keys[page], info)
+                    yield path, image_data, None
+            except Exception as e:
+                yield path, None, e
+    
+    def _duplicate_record(self, path, page, pages, sig, timings, started):
+        """Запись для повтора уже обработанной страницы (без пикселей) или None"""
+        found = self.duplicates.find(sig)
+        if found is None:
             return None
+        original, distance = found
+        return {
+            'path': path,
+            'filename': os.path.basename(path),
+            'width': original['width'],
+            'height': original['height'],
+            'name': self._result_name(path, page, pages),
+            'page': page,
+            'pages': pages,
+            'duplicate_of': original,
+            'distance': distance,
+            'sig': sig,
+            'timings': timings,
+            'started': started
+        }
     
-    def get_parameters(self, image_width):
-        """Получение параметров от пользователя"""
+    def reuse_duplicate(self, image_data, w=None, d=None, bank=False, lines=False):
+        """Результаты для повтора страницы из результатов ее оригинала
+        
+        Профиль, границы и параметры w, d копируются из Mu1Result оригинала,
+        таблица и CSV записываются под именем повтора, график и прочие
+        файлы копируются. Оригинал из прошлого запуска берется из базы
+        результатов с теми же настройками и w, d (None - любые).
+        Возвращает None, если результатов оригинала нет (он не обработан,
+        в базе нет подходящей строки или нет его файлов) - тогда страницу
+        нужно обработать заново.
+        """
+        original = image_data['duplicate_of']
+        source = original['result']
+        if source is None and original.get('stored') and self.index:
+            source = self.index.latest(original['path'], original['page'], self._options_label(), w, d)
+        if source is None:
+            return None
+        w, d = source.w, source.d
+        copies = [(src, dst) for src, dst in zip(self._output_paths(original['name'], w, d, bank, lines),
+                                                 self._output_paths(image_data['name'], w, d, bank, lines))
+                  if not os.path.basename(dst).startswith(('результаты_', 'данные_'))]
+        if not all(os.path.exists(src) for src, _ in copies):
+            return None
+        print(f"Повтор изображения {original['filename']} (отличие хэшей {image_data['distance']} бит), "
+              f"результаты взяты из него")
+        self.profiler.set_params(w=w, d=d)
+        
+        with self.profiler.stage('reuse_duplicate'):
+            result = mu1_result.Mu1Result.for_image(image_data, w, d, source.threshold)
+            result.fill(source.x, source.y, source.peaks, source.valleys)
+            saved = self.save_results(image_data, result.x, result.y, w, d,
+                                      result.peak_indices, result.valley_indices, result.threshold)
+            for src, dst in copies:
+                with open(src, 'rb') as fsrc, batch_journal.atomic_open(dst, 'wb') as fdst:
+                    shutil.copyfileobj(fsrc, fdst)
+        image_data['saved'] = saved
+        
+        if self.index:
+            with self.profiler.stage('index'):
+                self.index.add(result, self._options_label(), image_data['path'])
+        
+        self.reused += 1
+        self.profiler.end_image()
+        return result
+    
+    def _reload_duplicate(self, image_data):
+        """Чтение страницы-повтора, результаты оригинала которой взять нельзя.
+        
+        Повтор становится представителем своей подписи в индексе: его
+        результат получат следующие повторы.
+        """
+        path, page, pages = image_data['path'], image_data['page'], image_data['pages']
+        with self.profiler.stage('decode'):
+            img_array, _ = image_io.load_grayscale(path, self.scale, page)
+        if self.median_radius:
+            with self.profiler.stage('median'):
+                img_array = self.backend.median(img_array, self.median_radius)
+        original = image_data.pop('duplicate_of')
+        del image_data['distance']
+        image_data.update(self._image_record(path, img_array, page, pages))
+        if self.binarize:
+            with self.profiler.stage('binarize'):
+                self._binarize(image_data)
+        # Запись индекса общая у всех повторов - обновляем ее на месте
+        original.clear()
+        original.update({'filename': image_data['filename'], 'name': image_data['name'],
+                         'width': image_data['width'], 'height': image_data['height'], 'result': None})
+        image_data['original'] = original
+    
+    def auto_parameters(self, image_data):
+        """(w, d, шаг символов) по автокорреляции профиля сумм столбцов или None"""
+        if 'packed' in image_data:
+            col_sums = image_data['packed'].column_sums()
+        else:
+            col_sums = mu1_engine.column_sums(image_data['array'])
+        return auto_window.choose_parameters(col_sums, image_data['width'])
+    
+    def get_parameters(self, image_width, suggested=None):
+        """Получение параметров от пользователя
+        
+        suggested - (w, d, шаг символов) из auto_parameters: их можно
+        принять одним ответом вместо подбора вручную.
+        """
         print("\n" + "=" * 40)
         print("НАСТРОЙКА ПАРАМЕТРОВ ФИЛЬТРА")
         print("=" * 40)
         
+        if suggested:
+            w, d, pitch = suggested
+            print(f"\nШаг символов по автокорреляции профиля: {pitch:.1f} пикселей")
+            print(f"Рекомендуемые параметры: w = {w}, d = {d}")
+            choice = input("Использовать их? (да/нет): ").lower().strip()
+            if choice in ['да', 'д', 'yes', 'y']:
+                return w, d
+        else:
+            print("\nВыраженного шага символов не найдено - укажите параметры вручную")
+        
         while True:
             try:
                 print(f"\nШирина изображения: {image_width} пикселей")
@@ -254,69 +571,93 @@ class ImageFilterAnalyzer:
         """Применение фильтра активного восприятия"""
         print(f"\nПрименение фильтра...")
         
-        img_array = image_data['array']
         width = image_data['width']
-        height = image_data['height']
-        
-        x_values = []
-        y_values = []
         total_steps = (width - w) // d + 1
         
         print(f"Всего позиций для анализа: {total_steps}")
         
-        for i, start_x in enumerate(range(0, width - w + 1, d)):
-            # Простой прогресс-бар
-            if i % max(1, total_steps // 10) == 0:
-                progress = (i + 1) / total_steps * 100
-                print(f"  Прогресс: {progress:.0f}%", end='\r')
-            
-            # Центр текущего окна
-            center_x = start_x + w / 2
-            
-            # Вырезаем область
-            region = img_array[0:height, start_x:start_x + w]
-            
-            # Делим на левую и правую половины
-            half_w = w // 2
-            left_half = region[:, 0:half_w]
-            right_half = region[:, half_w:]
-            
-            # Считаем сумму яркости
-            left_sum = np.sum(left_half)
-            right_sum = np.sum(right_half)
-            
-            # Разность сумм
-            diff = right_sum - left_sum
-            
-            x_values.append(center_x)
-            y_values.append(diff)
-        
-        print("  Прогресс: 100%")
-        
-        x = np.array(x_values)
-        y = np.array(y_values)
+        # Суммы яркости по столбцам считаются один раз, разность половин
+        # каждого окна - по префиксным суммам (или в скомпилированном ядре)
+        if 'packed' in image_data:
+            # Бинарная страница: суммы столбцов прямо по упакованным битам
+            x, y = image_data['packed'].mu1(w, d)
+        else:
+            x, y = self.backend.mu1(image_data['array'], w, d)
         
         print(f"Обработано точек: {len(x)}")
         return x, y
     
+    def apply_filter_bank(self, image_data, w, d):
+        """Банк фильтров (++++), (--++), (+--+), (+-+-) за один проход"""
+        print(f"\nПрименение банка фильтров...")
+        x, features, names = mu1_engine.filter_bank(self._pixels(image_data), w, d,
+                                                       workers=self.backend.workers)
+        print(f"Фильтров: {len(names)}, позиций: {features.shape[1]}")
+        return x, features, names
+    
+    def apply_filter_2d(self, image_data, h, w, dy, dx, axis='x'):
+        """Двумерный фильтр по блокам h x w через интегральное изображение"""
+        print(f"\nПрименение фильтра по блокам {h}x{w} (ось {axis})...")
+        yc, xc, values = integral_image.mu1_blocks(self._pixels(image_data), h, w, dy, dx, axis=axis)
+        print(f"Обработано блоков: {values.shape[0]}x{values.shape[1]}")
+        return yc, xc, values
+    
+    def apply_filter_lines(self, image_data, w, d):
+        """Фильтр и поиск границ отдельно для каждой текстовой строки"""
+        print(f"\nПоиск текстовых строк...")
+        lines = text_lines.line_profiles(self._pixels(image_data), w, d)
+        print(f"Найдено строк: {len(lines)}")
+        return lines
+    
+    def save_lines(self, image_data, lines, w, d):
+        """Сохранение границ символов по строкам в текстовый файл (True - успешно)"""
+        filename = f"строки_{image_data['name']}_w{w}_d{d}.txt"
+        save_path = os.path.join(self.program_dir, filename)
+        
+        try:
+            with batch_journal.atomic_open(save_path, 'w', encoding='utf-8') as f:
+                f.write(f"Исходный файл: {image_data['filename']}\n")
+                f.write(f"Параметры фильтра: w={w}, d={d}\n")
+                f.write(f"Найдено строк: {len(lines)}\n\n")
+                for i, line in enumerate(lines, 1):
+                    x = line['x']
+                    f.write(f"Строка {i:3d}: Y = {line['top']}..{line['bottom']}, "
+                            f"границ символов: {len(line['peaks'])}\n")
+                    if len(line['peaks']) > 0:
+                        coords = ", ".join(f"{x[p]:.1f}" for p in line['peaks'])
+                        f.write(f"    X: {coords}\n")
+            print(f"Границы по строкам сохранены: {save_path}")
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения границ по строкам: {e}")
+            return False
+    
+    def save_filter_bank(self, image_data, x, features, names, w, d):
+        """Сохранение матрицы признаков банка фильтров в CSV (True - успешно)"""
+        csv_filename = f"признаки_{image_data['name']}_w{w}_d{d}.csv"
+        csv_path = os.path.join(self.program_dir, csv_filename)
+        
+        try:
+            with batch_journal.atomic_open(csv_path, 'w', encoding='utf-8') as f:
+                f.write("Номер,X," + ",".join(names) + "\n")
+                for i in range(len(x)):
+                    values = ",".join(str(v) for v in features[:, i])
+                    f.write(f"{i+1},{x[i]:.1f},{values}\n")
+            print(f"Признаки банка фильтров сохранены: {csv_path}")
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения признаков: {e}")
+            return False
+    
     def find_boundaries(self, y):
         """Автоматический поиск границ символов"""
         threshold = 0.3  # Фиксированный порог по умолчанию
-        peaks = []
-        valleys = []
-        
-        for i in range(1, len(y) - 1):
-            # Ищем локальные максимумы (границы символов)
-            if y[i] > y[i-1] and y[i] > y[i+1]:
-                if y[i] > np.max(y) * threshold:
-                    peaks.append(i)
-            
-            # Ищем локальные минимумы
-            if y[i] < y[i-1] and y[i] < y[i+1]:
-                if y[i] < np.min(y) * threshold:
-                    valleys.append(i)
         
-        return np.array(peaks), np.array(valleys), threshold
+        # Локальные максимумы выше max(y) * threshold - границы символов,
+        # локальные минимумы ниже min(y) * threshold - минимумы
+        peaks, valleys = self.backend.extrema(y, threshold)
+        
+        return np.flatnonzero(peaks), np.flatnonzero(valleys), threshold
     
     def display_table(self, x, y, peaks, valleys):
         """Отображение таблицы значений x, y"""
@@ -365,7 +706,60 @@ class ImageFilterAnalyzer:
             if len(peaks) > 10:
                 print(f"  ... и еще {len(peaks) - 10} границ")
     
-    def plot_function(self, x, y, image_data, w, d, peaks, valleys):
+    def show_preview(self, image_data, w, d, step=16):
+        """Быстрый предпросмотр y(x) по каждой step-й строке с полосой ошибки
+        
+        Сразу показывается оценка по части строк, затем она уточняется в
+        фоновом потоке (preview.refine_in_background), а график обновляется
+        после каждого этапа до точного профиля. Закрытие окна прерывает уточнение.
+        """
+        pixels = self._pixels(image_data)
+        x, y, err = preview.preview_profile(pixels, w, d, step)
+        rows = len(range(0, image_data['height'], max(1, step)))
+        print(f"\nПредпросмотр по {rows} из {image_data['height']} строк")
+        print(f"  Средняя оценка ошибки: ±{np.mean(err):.0f}")
+        
+        fig = plt.figure(figsize=(14, 5))
+        line, = plt.plot(x, y, 'b-', linewidth=1, label=f'оценка y(x), w={w}, d={d}')
+        band = plt.fill_between(x, y - 2 * err, y + 2 * err, color='b', alpha=0.2, label='±2σ')
+        plt.xlabel('Координата X (центр фильтра, пиксели)', fontsize=12)
+        plt.ylabel('Разность яркостей Y', fontsize=12)
+        title = f'Предпросмотр y(x) = μ₁(x)\nИзображение: {image_data["filename"]}'
+        plt.title(title, fontsize=14)
+        plt.grid(True, alpha=0.3, linestyle='--')
+        plt.legend(fontsize=12)
+        plt.tight_layout()
+        plt.show(block=False)
+        plt.pause(0.1)
+        
+        # Фоновый поток считает, а график (matplotlib) обновляется только здесь
+        stages = queue.Queue()
+        thread, stop = preview.refine_in_background(pixels, w, d, lambda *stage: stages.put(stage), step)
+        fraction = rows / image_data['height']
+        while fraction < 1:
+            if not plt.fignum_exists(fig.number):
+                stop.set()
+                print("  Уточнение прервано (окно закрыто)")
+                return
+            try:
+                x, y, err, fraction = stages.get(timeout=0.05)
+            except queue.Empty:
+                if not thread.is_alive() and stages.empty():
+                    break
+                plt.pause(0.05)
+                continue
+            if fraction * image_data['height'] <= rows:
+                # Первый этап фонового уточнения повторяет уже показанную оценку
+                continue
+            line.set_ydata(y)
+            band.remove()
+            band = plt.fill_between(x, y - 2 * err, y + 2 * err, color='b', alpha=0.2)
+            plt.title(f'{title} ({fraction * 100:.0f}% строк)', fontsize=14)
+            print(f"  Уточнение: {fraction * 100:.0f}% строк, ошибка ±{np.mean(err):.0f}")
+            plt.pause(0.05)
+        thread.join()
+    
+    def plot_function(self, x, y, image_data, w, d, peaks, valleys, show=True):
         """Построение графика функции y(x)"""
         plt.figure(figsize=(14, 8))
         
@@ -397,24 +791,47 @@ class ImageFilterAnalyzer:
         # Сохранение графика
         filename = f"график_{image_data['name']}_w{w}_d{d}.png"
         save_path = os.path.join(self.program_dir, filename)
-        plt.savefig(save_path, dpi=150, bbox_inches='tight')
+        with batch_journal.atomic_open(save_path, 'wb') as f:
+            plt.savefig(f, format='png', dpi=150, bbox_inches='tight')
         print(f"\nГрафик сохранен: {save_path}")
         
-        plt.show()
+        if show:
+            plt.show()
+        else:
+            plt.close()
     
     def save_results(self, image_data, x, y, w, d, peaks, valleys, threshold):
-        """Сохранение результатов в текстовый файл"""
+        """Сохранение результатов в текстовый файл и CSV (True - оба записаны)
+        
+        Файлы пишутся через временные (batch_journal.atomic_open): при ошибке
+        на месте не остается наполовину записанного файла.
+        """
         filename = f"результаты_{image_data['name']}_w{w}_d{d}.txt"
         save_path = os.path.join(self.program_dir, filename)
         
         try:
-            with open(save_path, 'w', encoding='utf-8') as f:
+            with batch_journal.atomic_open(save_path, 'w', encoding='utf-8') as f:
                 f.write("=" * 70 + "\n")
                 f.write("РЕЗУЛЬТАТЫ АНАЛИЗА ИЗОБРАЖЕНИЯ С ФИЛЬТРОМ АКТИВНОГО ВОСПРИЯТИЯ\n")
                 f.write("=" * 70 + "\n\n")
                 
                 f.write(f"Исходный файл: {image_data['filename']}\n")
                 f.write(f"Размер изображения: {image_data['width']}x{image_data['height']} пикселей\n")
+                if image_data['pages'] > 1:
+                    f.write(f"Страница: {image_data['page'] + 1} из {image_data['pages']}\n")
+                if self.scale > 1:
+                    f.write(f"Изображение уменьшено при чтении в {self.scale} раз\n")
+                if self.median_radius:
+                    size = 2 * self.median_radius + 1
+                    f.write(f"Медианный фильтр: {size}x{size}\n")
+                if 'duplicate_of' in image_data:
+                    f.write(f"Повтор изображения {image_data['duplicate_of']['filename']}: "
+                            f"результаты взяты из него\n")
+                if image_data.get('auto'):
+                    f.write(f"Параметры выбраны по шагу символов: {image_data['auto'][2]:.1f} пикселей\n")
+                if 'packed' in image_data:
+                    f.write(f"Бинаризация по порогу Оцу: {image_data['packed'].threshold} "
+                            f"(y(x) - разность числа светлых пикселей)\n")
                 f.write(f"Параметры фильтра: w={w}, d={d}\n")
                 f.write(f"Порог для поиска границ: {threshold}\n\n")
                 
@@ -453,7 +870,7 @@ class ImageFilterAnalyzer:
             csv_filename = f"данные_{image_data['name']}_w{w}_d{d}.csv"
             csv_path = os.path.join(self.program_dir, csv_filename)
             
-            with open(csv_path, 'w', encoding='utf-8') as f:
+            with batch_journal.atomic_open(csv_path, 'w', encoding='utf-8') as f:
                 f.write("Номер,X,Y,Граница_символа,Минимум\n")
                 for i in range(len(x)):
                     is_boundary = "1" if i in peaks else "0"
@@ -461,9 +878,268 @@ class ImageFilterAnalyzer:
                     f.write(f"{i+1},{x[i]:.1f},{y[i]:.0f},{is_boundary},{is_valley}\n")
             
             print(f"Данные в CSV формате сохранены: {csv_path}")
+            return True
             
         except Exception as e:
             print(f"Ошибка сохранения результатов: {e}")
+            return False
+    
+    def process_image(self, image_data, w, d, show_plot=True, bank=False, lines=False, job=None):
+        """Фильтр, поиск границ, таблица, график и сохранение для одного изображения
+        
+        job - задание пула процессов (shared_pool), если фильтр и границы
+        уже рассчитываются в рабочем процессе. Возвращает Mu1Result;
+        image_data['saved'] - все ли выходные файлы записаны.
+        """
+        self.profiler.set_params(w=w, d=d)
+        
+        if job is None:
+            # Применение фильтра
+            with self.profiler.stage('apply_filter'):
+                x, y = self.apply_filter(image_data, w, d)
+            
+            # Автоматический поиск границ (с фиксированным порогом 0.3)
+            with self.profiler.stage('find_boundaries'):
+                peaks, valleys, threshold = self.find_boundaries(y)
+        else:
+            # Результат рабочего процесса из разделяемой памяти
+            with self.profiler.stage('wait_pool'):
+                x, y, peaks, valleys = job.result()
+            threshold = job.threshold
+        
+        # Компактный результат: массивы точно по числу позиций окна, без пикселей
+        result = mu1_result.Mu1Result.for_image(image_data, w, d, threshold).fill(x, y, peaks, valleys)
+        x, y = result.x, result.y
+        peaks, valleys = result.peak_indices, result.valley_indices
+        
+        # Отображение таблицы
+        self.display_table(x, y, peaks, valleys)
+        
+        # Построение графика
+        with self.profiler.stage('plot_function'):
+            self.plot_function(x, y, image_data, w, d, peaks, valleys, show=show_plot)
+        
+        # Сохранение результатов
+        with self.profiler.stage('save_results'):
+            saved = self.save_results(image_data, x, y, w, d, peaks, valleys, threshold)
+        
+        # Запись в базу результатов (вставка пачками)
+        if self.index:
+            with self.profiler.stage('index'):
+                self.index.add(result, self._options_label(), image_data['path'])
+        
+        # Банк фильтров по четвертям окна (по запросу)
+        if bank:
+            with self.profiler.stage('filter_bank'):
+                x_bank, features, names = self.apply_filter_bank(image_data, w, d)
+                saved = self.save_filter_bank(image_data, x_bank, features, names, w, d) and saved
+        
+        # Границы символов по отдельным текстовым строкам (по запросу)
+        if lines:
+            with self.profiler.stage('text_lines'):
+                line_results = self.apply_filter_lines(image_data, w, d)
+                saved = self.save_lines(image_data, line_results, w, d) and saved
+        
+        image_data['saved'] = saved
+        self.profiler.end_image()
+        return result
+    
+    def run_batch(self, paths, w, d, bank=False, lines=False, prefetch_depth=2, processes=0, journal=None,
+                  auto=False):
+        """Пакетная обработка списка изображений без диалога с пользователем
+        
+        Следующие prefetch_depth изображений читаются и декодируются в фоне,
+        пока обрабатывается текущее (prefetch_depth=0 - без опережения; при
+        профилировании опережения нет, чтобы замеры этапов не смешивались).
+        При processes > 0 фильтр и поиск границ выполняются в пуле процессов,
+        массивы передаются через разделяемую память. С журналом
+        (batch_journal.BatchJournal) уже обработанные с теми же параметрами
+        страницы пропускаются, а каждая завершенная страница записывается в журнал.
+        При auto=True w и d выбираются для каждой страницы по шагу символов
+        (auto_window), а переданные w, d используются, если шаг не найден.
+        """
+        processed = 0
+        total = 0
+        failed = 0
+        self.skipped = 0
+        self.reused = 0
+        self.failed_paths = set()
+        params = f"{'auto,' if auto else ''}w={w},d={d},{self._options_label()},bank={int(bank)},lines={int(lines)}"
+        # С автоматическими w, d имена выходных файлов известны только из журнала
+        outputs = None if auto else (lambda name: self._output_paths(name, w, d, bank, lines))
+        if self.profiler.enabled and prefetch_depth:
+            # tracemalloc и время считаются без параллельного чтения следующей страницы
+            print("Профилирование: чтение без опережения (--prefetch 0)")
+            prefetch_depth = 0
+        images = prefetch.prefetch_iter(self._iter_pages(paths, journal, params, outputs), depth=prefetch_depth)
+        pool = shared_pool.SharedMu1Pool(processes, backend=self.backend.name) if processes > 0 else None
+        # Изображения, отправленные в пул и ожидающие таблицы, графика и сохранения
+        pending = deque()
+        
+        def finish(item):
+            # Ошибка одной страницы не прерывает пакет (и режим наблюдения)
+            try:
+                self._finish_batch_image(*item, bank, lines, auto)
+                return True
+            except Exception as e:
+                print(f"\nОшибка обработки {item[0]['name']}: {type(e).__name__}: {e}")
+                plt.close('all')
+                self.failed_paths.add(item[0]['path'])
+                return False
+        
+        try:
+            for (path, image_data, error), wait in images:
+                total += 1
+                if error is not None:
+                    print(f"\nОшибка загрузки изображения {path}: {error}")
+                    self.failed_paths.add(path)
+                    continue
+                duplicate = 'duplicate_of' in image_data
+                page_w, page_d = w, d
+                try:
+                    if auto and not duplicate:
+                        with self.profiler.measure(image_data['timings'], 'auto_params'):
+                            image_data['auto'] = self.auto_parameters(image_data)
+                        if image_data['auto']:
+                            page_w, page_d, _ = image_data['auto']
+                    # Повтор берет w, d у оригинала (пропущенный оригинал - пропуск повтора)
+                    if not duplicate and page_w > image_data['width']:
+                        print(f"\nПропуск {image_data['name']}: w={page_w} больше ширины изображения")
+                        continue
+                    image_data['wait'] = wait
+                    job = pool.submit(self._pixels(image_data), page_w, page_d) if pool and not duplicate else None
+                except Exception as e:
+                    print(f"\nОшибка обработки {image_data['name']}: {type(e).__name__}: {e}")
+                    self.failed_paths.add(path)
+                    failed += 1
+                    continue
+                pending.append((image_data, job, page_w, page_d))
+                # С пулом в работе держим до processes изображений, чтобы процессы не простаивали
+                while len(pending) > (processes if pool else 0):
+                    if finish(pending.popleft()):
+                        processed += 1
+                    else:
+                        failed += 1
+            while pending:
+                if finish(pending.popleft()):
+                    processed += 1
+                else:
+                    failed += 1
+        finally:
+            # Блоки разделяемой памяти удаляются и при ошибках
+            if pool:
+                pool.close()
+            if self.index:
+                self.index.flush()
+        
+        print(f"\nОбработано изображений (страниц): {processed} из {total}")
+        if failed:
+            print(f"С ошибками обработки: {failed}")
+        if self.skipped:
+            print(f"Пропущено (уже обработано по журналу): {self.skipped}")
+        if self.reused:
+            print(f"Повторов (результаты взяты у оригиналов): {self.reused}")
+        if self.profiler.enabled:
+            print_summary(summarize(self.profiler.records))
+        return processed
+    
+    def watch_directory(self, directory, w, d, interval=2.0, settle=2.0, **batch_options):
+        """Режим наблюдения: обработка новых и измененных изображений в папке
+        
+        Папка опрашивается раз в interval секунд через инкрементальный индекс;
+        файл обрабатывается, когда он не менялся settle секунд. Графики
+        программы (график_*.png) не считаются входными изображениями.
+        Файл, который не удалось прочитать или обработать, повторяется
+        с нарастающей задержкой (см. watch_folder.FileIndex.mark_failed).
+        Остановка - Ctrl+C.
+        """
+        index = watch_folder.FileIndex(directory, settle=settle, ignore_prefixes=('график_',))
+        print(f"\nНаблюдение за папкой: {os.path.abspath(directory)}")
+        print(f"Опрос каждые {interval} с, файл считается записанным через {settle} с. Остановка - Ctrl+C")
+        processed = 0
+        try:
+            while True:
+                ready = []
+                try:
+                    ready = index.poll()
+                    if ready:
+                        print(f"\nНовых или измененных изображений: {len(ready)}")
+                        processed += self.run_batch(ready, w, d, **batch_options)
+                        for path in ready:
+                            if path not in self.failed_paths:
+                                index.mark_done(path)
+                                continue
+                            retry_at = index.mark_failed(path)
+                            if retry_at is None:
+                                print(f"Файл {os.path.basename(path)} не обработан после "
+                                      f"{index.max_retries} повторов - пропускается до изменения")
+                            else:
+                                print(f"Файл {os.path.basename(path)} будет обработан повторно "
+                                      f"через {retry_at - time.time():.0f} с")
+                except Exception as e:
+                    # Ошибки отдельных страниц run_batch обрабатывает сам; здесь - сбой
+                    # опроса папки или запуска пакета: наблюдение продолжается
+                    print(f"\nОшибка цикла наблюдения: {type(e).__name__}: {e}")
+                    for path in ready:
+                        index.mark_failed(path)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print(f"\nНаблюдение остановлено. Всего обработано: {processed}")
+        return processed
+    
+    def _finish_batch_image(self, image_data, job, w, d, bank, lines, auto=False):
+        """Обработка одного изображения пакета после чтения (и расчета в пуле)"""
+        label = image_data['filename']
+        if image_data['pages'] > 1:
+            label += f" (страница {image_data['page'] + 1} из {image_data['pages']})"
+        print(f"\nИзображение: {label} "
+              f"({image_data['width']}x{image_data['height']}), "
+              f"ожидание чтения {image_data['wait'] * 1000:.1f} мс")
+        
+        # Этапы чтения выполнялись в фоновом потоке - записываем их замеры
+        self.profiler.begin_image(label, started=image_data.pop('started'))
+        for stage, measured in image_data.pop('timings').items():
+            self.profiler.record(stage, *measured)
+        self.profiler.record('wait_decode', image_data.pop('wait'))
+        
+        result = None
+        if 'duplicate_of' in image_data:
+            # Оригинал из прошлого запуска подходит только с теми же w, d (кроме --auto)
+            result = self.reuse_duplicate(image_data, None if auto else w, None if auto else d, bank, lines)
+            if result is None:
+                print(f"Результатов оригинала {image_data['duplicate_of']['filename']} нет - "
+                      f"страница обрабатывается заново")
+                self._reload_duplicate(image_data)
+                if auto:
+                    image_data['auto'] = self.auto_parameters(image_data)
+                    if image_data['auto']:
+                        w, d, _ = image_data['auto']
+                if w > image_data['width']:
+                    raise ValueError(f"w={w} больше ширины изображения")
+        if 'duplicate_of' not in image_data:
+            if 'auto' in image_data:
+                if image_data['auto']:
+                    print(f"Шаг символов {image_data['auto'][2]:.1f} пикселей: w = {w}, d = {d}")
+                else:
+                    print(f"Выраженного шага символов нет: w = {w}, d = {d}")
+            result = self.process_image(image_data, w, d, show_plot=False, bank=bank, lines=lines, job=job)
+            if 'original' in image_data:
+                image_data['original']['result'] = result
+            # Подпись - в базу, чтобы повторы находились и в следующих запусках
+            if self.index and 'original' in image_data and image_data.get('saved'):
+                self.index.add_signature(image_data['path'], image_data['page'], image_data['pages'],
+                                         image_data['width'], image_data['height'], image_data['sig'])
+        
+        # В журнал - только если все результаты страницы записаны
+        if 'journal' in image_data and result is not None and image_data.get('saved'):
+            journal, key, info = image_data.pop('journal')
+            if self.index:
+                # Строка базы должна быть записана раньше отметки о завершении
+                self.index.flush()
+            journal.record(key, info, image_data['page'],
+                           self._output_paths(image_data['name'], result.w, result.d, bank, lines))
+        elif 'journal' in image_data and result is not None:
+            print(f"Не все результаты {image_data['name']} записаны - страница будет обработана заново")
     
     def run(self):
         """Основной цикл программы"""
@@ -484,22 +1160,16 @@ class ImageFilterAnalyzer:
                 continue
             
             # Ввод параметров
-            w, d = self.get_parameters(image_data['width'])
-            
-            # Применение фильтра
-            x, y = self.apply_filter(image_data, w, d)
-            
-            # Автоматический поиск границ (с фиксированным порогом 0.3)
-            peaks, valleys, threshold = self.find_boundaries(y)
-            
-            # Отображение таблицы
-            self.display_table(x, y, peaks, valleys)
+            w, d = self.get_parameters(image_data['width'], self.auto_parameters(image_data))
             
-            # Построение графика
-            self.plot_function(x, y, image_data, w, d, peaks, valleys)
+            # Быстрый предпросмотр перед полным расчетом
+            choice = input("\nПоказать быстрый предпросмотр? (да/нет): ").lower().strip()
+            if choice in ['да', 'д', 'yes', 'y']:
+                self.show_preview(image_data, w, d)
             
-            # Сохранение результатов
-            self.save_results(image_data, x, y, w, d, peaks, valleys, threshold)
+            self.process_image(image_data, w, d)
+            if self.index:
+                self.index.flush()
             
             # Повторный анализ
             while True:
@@ -513,8 +1183,62 @@ class ImageFilterAnalyzer:
                     print("Пожалуйста, введите 'да' или 'нет'")
 
 
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Анализ изображений фильтром активного восприятия")
+    parser.add_argument('images', nargs='*',
+                        help="изображения для пакетной обработки (без них - диалоговый режим)")
+    parser.add_argument('-w', type=int, default=32, help="ширина фильтра (кратна 4)")
+    parser.add_argument('-d', type=int, default=1, help="шаг фильтра")
+    parser.add_argument('--auto', action='store_true',
+                        help="w и d для каждой страницы по шагу символов (-w, -d - если шаг не найден)")
+    parser.add_argument('--bank', action='store_true',
+                        help="дополнительно рассчитать банк из четырех фильтров по четвертям окна")
+    parser.add_argument('--lines', action='store_true',
+                        help="дополнительно найти границы символов в каждой текстовой строке")
+    parser.add_argument('--watch', metavar='ПАПКА',
+                        help="режим наблюдения: обрабатывать новые изображения в папке")
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help="период опроса папки в режиме наблюдения, с")
+    parser.add_argument('--prefetch', type=int, default=2, metavar='K',
+                        help="сколько следующих изображений читать в фоне "
+                             "(0 - без опережения; с --profile всегда 0)")
+    parser.add_argument('--processes', type=int, default=0, metavar='N',
+                        help="считать фильтр в N процессах через разделяемую память (0 - в основном процессе)")
+    parser.add_argument('--scale', type=int, default=1, choices=image_io.JPEG_SCALES,
+                        help="уменьшить изображение при чтении в 2, 4 или 8 раз")
+    parser.add_argument('--median', type=int, default=0, metavar='R',
+                        help="медианный фильтр окном (2R+1)x(2R+1) перед расчетом (0 - без фильтра); "
+                             "на NumPy около 0.5-1 с на мегапиксель при любом R, для больших страниц - --backend numba")
+    parser.add_argument('--binarize', action='store_true',
+                        help="бинаризовать страницу по Оцу и хранить ее упакованной (8 пикселей в байте)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="не пересчитывать повторы (пересканы) уже обработанных страниц "
+                             "(с --index - и страниц из прошлых запусков)")
+    parser.add_argument('--journal', metavar='ФАЙЛ.jsonl',
+                        help="журнал пакета: при повторном запуске пропускать уже обработанные страницы")
+    parser.add_argument('--index', metavar='ФАЙЛ.sqlite',
+                        help="добавлять результаты в базу SQLite (запросы - python results_index.py)")
+    parser.add_argument('--threads', type=int, metavar='N',
+                        help="потоков для сумм столбцов одного большого изображения "
+                             "(по умолчанию - по числу ядер, 1 - без потоков)")
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'numba'],
+                        help="вычислительные ядра (по умолчанию auto или MU1_BACKEND)")
+    parser.add_argument('--profile', metavar='ФАЙЛ.jsonl',
+                        help="записывать время и память по этапам в JSON lines")
+    parser.add_argument('--summary', metavar='ФАЙЛ.jsonl',
+                        help="показать перцентили по ранее записанным замерам и выйти")
+    return parser.parse_args()
+
+
 def main():
     """Главная функция"""
+    args = parse_args()
+    
+    if args.summary:
+        print_summary(summarize(load_records(args.summary)))
+        return
+    
     print("=" * 70)
     print("ПРОГРАММА АНАЛИЗА ИЗОБРАЖЕНИЙ С ФИЛЬТРОМ АКТИВНОГО ВОСПРИЯТИЯ")
     print("=" * 70)
@@ -532,9 +1256,42 @@ def main():
         
         print("Все библиотеки загружены успешно!")
         
+        if args.median < 0:
+            print("Радиус медианного фильтра не может быть отрицательным!")
+            return
+        if args.prefetch < 0:
+            print("Глубина опережения не может быть отрицательной!")
+            return
+        if args.threads is not None and args.threads < 1:
+            print("Число потоков должно быть положительным!")
+            return
+        
         # Запускаем анализатор
-        analyzer = ImageFilterAnalyzer()
-        analyzer.run()
+        analyzer = ImageFilterAnalyzer(profile_path=args.profile, backend=args.backend, scale=args.scale,
+                                        median_radius=args.median, binarize=args.binarize,
+                                        threads=args.threads, index_path=args.index, dedup=args.dedup)
+        if args.images or args.watch:
+            if args.w <= 0 or args.w % 4 != 0 or args.d <= 0:
+                print("Ширина фильтра должна быть кратна 4, шаг - положительным!")
+                return
+            journal = batch_journal.BatchJournal(args.journal) if args.journal else None
+            if journal:
+                print(f"Журнал пакета: {args.journal} (завершено элементов: {len(journal.entries)})")
+            options = dict(bank=args.bank, lines=args.lines, prefetch_depth=args.prefetch,
+                           processes=args.processes, journal=journal, auto=args.auto)
+            try:
+                if args.images:
+                    analyzer.run_batch(args.images, args.w, args.d, **options)
+                if args.watch:
+                    analyzer.watch_directory(args.watch, args.w, args.d, interval=args.interval, **options)
+            finally:
+                if journal:
+                    journal.close()
+        else:
+            analyzer.run()
+        analyzer.profiler.close()
+        if analyzer.index:
+            analyzer.index.close()
         
     except ImportError as e:
         print(f"Ошибка: {e}")
@@ -4,6 +4,9 @@ import numpy as np
 
 def getImage(filename):
    with Image.open(filename) as img:
+      # JPEG декодируется сразу в оттенки серого (только яркостный канал)
+      if img.format == "JPEG":
+         img.draft("L", img.size)
       img.load()
    wImg, hImg = img.size
    print("Размерность изображения: ", wImg, 'на', hImg, 'пикселей')
@@ -9,8 +9,14 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image as ImagePIL
 from tkinter import *
 from tkinter import ttk
+import threading
+import queue
 
 fileName = ""
+# Очередь результатов фонового уточнения и номер текущего расчета
+previewQueue = queue.Queue()
+previewStop = threading.Event()
+previewId = 0
 
 def getFilter(ev = None):
   # Изображение
@@ -18,6 +24,9 @@ def getFilter(ev = None):
       showerror("Ошибка!", "Файл не выбран.")
       return
   image = ImagePIL.open(fileName)
+  # JPEG сразу декодируется в оттенки серого (только канал яркости)
+  if image.format == "JPEG":
+    image.draft("L", image.size)
   image = image.convert("L")
   imageArray = np.array(image)
   w = int(inpW.get("1.0", END))
@@ -31,6 +40,74 @@ def getFilter(ev = None):
 
   # Параметры изображения
   width, height = image.size
+  # Количество итераций
+  count = (width - w) // (d + 1)
+  if count < 1:
+      showerror("Ошибка!", "Значение W слишком большое.")
+      return
+  lefts = np.arange(count) * d
+
+  # Сразу показываем предпросмотр по каждой 16-й строке,
+  # точный расчет продолжается в фоновом потоке
+  global previewStop, previewId
+  previewStop.set()
+  previewStop = threading.Event()
+  previewId += 1
+  y, err = getPreview(imageArray, lefts, w, 16)
+  getPlot(lefts + w / 2, y, ev, err, "предпросмотр: каждая 16-я строка")
+  threading.Thread(target=refineFilter,
+                   args=(imageArray, width, w, d, lefts, previewStop, previewId),
+                   daemon=True).start()
+  root.after(100, pollPreview, previewId)
+
+def getPreview(imageArray, lefts, w, step):
+  # Оценка y(x) по каждой step-й строке, приведенная к полной высоте,
+  # и стандартная ошибка этой оценки
+  height = imageArray.shape[0]
+  rows = imageArray[::step].astype(np.int64)
+  n = rows.shape[0]
+  prefix = np.zeros((n, rows.shape[1] + 1), dtype=np.int64)
+  np.cumsum(rows, axis=1, out=prefix[:, 1:])
+  halfWidth = w // 2
+  diffs = ((prefix[:, lefts + w] - prefix[:, lefts + halfWidth])
+           - (prefix[:, lefts + halfWidth] - prefix[:, lefts]))
+  y = diffs.mean(axis=0) * height
+  if n < 2:
+      return y, np.zeros(len(y))
+  err = height * diffs.std(axis=0, ddof=1) / np.sqrt(n) * np.sqrt(1 - n / height)
+  return y, err
+
+def refineFilter(imageArray, width, w, d, lefts, stop, runId):
+  # Постепенное уточнение: все больше строк, затем точный расчет
+  for step in (8, 4, 2):
+    if stop.is_set():
+      return
+    y, err = getPreview(imageArray, lefts, w, step)
+    previewQueue.put((runId, "preview", lefts + w / 2, y, err, step))
+  if stop.is_set():
+    return
+  xArr, yArr = computeFilter(imageArray, width, w, d)
+  previewQueue.put((runId, "exact", xArr, yArr, None, 1))
+
+def pollPreview(runId):
+  # Tkinter нельзя вызывать из фонового потока, поэтому результаты
+  # забираются из очереди здесь, в главном потоке
+  if runId != previewId:
+    return
+  try:
+    while True:
+      itemId, kind, x, y, err, step = previewQueue.get_nowait()
+      if itemId != previewId:
+        continue
+      if kind == "exact":
+        getTable(x, y)
+        return
+      getPlot(x, y, None, err, f"предпросмотр: каждая {step}-я строка")
+  except queue.Empty:
+    pass
+  root.after(100, pollPreview, runId)
+
+def computeFilter(imageArray, width, w, d):
   # Массив значений x и y
   xArr = []
   yArr = []
@@ -61,7 +138,7 @@ def getFilter(ev = None):
     x = left + w / 2
     xArr.append(x)
     yArr.append(y)
-  getTable(xArr, yArr, ev)
+  return xArr, yArr
 
 def getTable(x, y, ev = None):
   # Создаем таблицу с результатами
@@ -79,8 +156,12 @@ def getTable(x, y, ev = None):
   tree.grid(row=0, column=5, rowspan=6, columnspan=2, pady=10, padx=10, sticky="news")
   getPlot(x, y, ev)
 
-def getPlot(x, y, ev=None):
+def getPlot(x, y, ev=None, err=None, note=""):
     try:
+        # Убираем предыдущий график (при уточнении он перерисовывается несколько раз)
+        global plotFrame
+        if 'plotFrame' in globals():
+            plotFrame.destroy()
         plotFrame = Frame(root)
         plotFrame.grid(row=5, column=0,
                        columnspan=2,
@@ -94,6 +175,9 @@ def getPlot(x, y, ev=None):
 
         # Построение графика y(x)
         plotAx.plot(x, y, 'b-', linewidth=2, label='y(x) = μ1(x)', zorder=3)
+        # Полоса ошибки оценки предпросмотра
+        if err is not None:
+            plotAx.fill_between(x, y - 2 * err, y + 2 * err, color='b', alpha=0.2, label='±2σ', zorder=1)
         # Ось X
         plotAx.axhline(y=0, color='black', linewidth=2, linestyle='-', label='Ось X', zorder=2)
         # ось Y
@@ -102,7 +186,7 @@ def getPlot(x, y, ev=None):
 
         plotAx.set_xlabel('Координата x (пиксели)')
         plotAx.set_ylabel('y(x) = разница яркостей')
-        plotAx.set_title(f'График функции y(x) = μ1(x)')
+        plotAx.set_title(f'График функции y(x) = μ1(x)' + (f' ({note})' if note else ''))
         plotAx.grid(True, alpha=0.3)
         plotAx.legend()
 
@@ -1,8 +1,9 @@
-import numpy
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from PIL import Image
 from math import sqrt
+from concurrent.futures import ThreadPoolExecutor
 
 def getFilter(image, imageArray, w, d):
   # Параметры изображения
@@ -90,19 +91,27 @@ def getPlot(imagePath, x, y, w, d):
   plt.show()
   return
 
-if __name__ == "__main__":
-  # Получаем путь изображения
-  imagePath = "04.png"
-  imagePath2 = "09.png"
+def getImage(imagePath):
   # Получаем изображение
   image = Image.open(imagePath)
-  image2 = Image.open(imagePath2)
+  # JPEG сразу декодируется в оттенки серого (только канал яркости)
+  if image.format == "JPEG":
+    image.draft("L", image.size)
   # Конвертируем в формат L (оттенки серого), так как нам необходима только яркость пикселей
   image = image.convert("L")
-  image2 = image2.convert("L")
   # Переводим получившееся изображение в массив значений
   imageArray = np.array(image)
-  imageArray2 = np.array(image2)
+  return image, imageArray
+
+if __name__ == "__main__":
+  # Получаем путь изображения
+  imagePath = "04.png"
+  imagePath2 = "09.png"
+  # Вторая картинка декодируется в фоновом потоке, пока обрабатывается первая
+  # (Pillow отпускает GIL при декодировании)
+  pool = ThreadPoolExecutor(max_workers=1)
+  image2Future = pool.submit(getImage, imagePath2)
+  image, imageArray = getImage(imagePath)
   # Переменная для использования программы
   choice = "y"
   while choice != "n":
@@ -134,7 +143,8 @@ if __name__ == "__main__":
     # Вызываем функцию для вывода графика для первой картинки
     getPlot(imagePath, x, y, w, d)
 
-    # Вызываем функции для второй картинки
+    # Вызываем функции для второй картинки (ждем, если она еще загружается)
+    image2, imageArray2 = image2Future.result()
     x, y = getFilter(image2, imageArray2, w, d)
     getTable(x, y)
     getPlot(imagePath2, x, y, w, d)
@@ -146,6 +156,7 @@ if __name__ == "__main__":
     except:
         print("Некорректный ввод. Программа будет завершена.")
         choice = "n"
+  pool.shutdown()
   print("\n\nПрограмма завершена.")
 
 